@@ -1,6 +1,6 @@
 # encoding=UTF-8
 
-# Copyright © 2011-2022 Jakub Wilk <jwilk@jwilk.net>
+# Copyright © 2011-2026 Jakub Wilk <jwilk@jwilk.net>
 #
 # Permission is hereby granted, free of charge, to any person obtaining a copy
 # of this software and associated documentation files (the “Software”), to deal
@@ -25,15 +25,27 @@ pydiatra: helper functions for AST manipulation
 '''
 
 import ast
+import io
 import sys
 
 if sys.version_info >= (3, 2):
     import tokenize
     python_open = tokenize.open  # pylint: disable=no-member
-    del tokenize
+    def python_decode(data, path=None):
+        # the same as python_open(), but for in-memory source
+        buffer = io.BytesIO(data)
+        # detect_encoding() mentions the file name in error messages
+        # only if it can get it from the file object.
+        buffer.name = path
+        encoding, _ = tokenize.detect_encoding(buffer.readline)
+        buffer.seek(0)
+        with io.TextIOWrapper(buffer, encoding, line_buffering=True) as file:
+            return file.read()
 elif sys.version_info < (3,):
     def python_open(path):
         return open(path, 'rU')  # pylint: disable=consider-using-with,unspecified-encoding
+    def python_decode(data, path=None):  # pylint: disable=unused-argument
+        return data.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
 
 class OpDict(object):
 
@@ -117,6 +129,7 @@ __all__ = [
     'inequality_ops',
     'is_ops',
     'numeric_cmp_ops',
+    'python_decode',
     'python_open',
 ]
 
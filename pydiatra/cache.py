@@ -0,0 +1,216 @@
+# encoding=UTF-8
+
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+'''
+persistent cache of check results
+'''
+
+import errno
+import hashlib
+import marshal
+import os
+import sys
+
+from . import __version__
+from . import checks
+from . import utils
+
+# name of the file that the regexp memo is saved to
+# (it doesn't look like an entry, so prune() leaves it alone)
+regexp_memo_name = 'regexps'
+
+_salt = None
+
+def get_salt():
+    '''
+    hash of everything except the source code that affects check results
+    '''
+    global _salt  # pylint: disable=global-statement
+    if _salt is not None:
+        return _salt
+    h = hashlib.sha256()
+    h.update(__version__.encode('ASCII'))
+    h.update(b'\0')
+    h.update(sys.version.encode('UTF-8'))
+    h.update(b'\0')
+    h.update(repr(tuple(sys.flags)).encode('ASCII'))
+    if checks.selection is not None:
+        h.update(b'\0')
+        h.update(str(checks.selection).encode('ASCII'))
+    for name in sorted(os.listdir(checks.datadir)):
+        path = os.path.join(checks.datadir, name)
+        with open(path, 'rb') as file:
+            data = file.read()
+        h.update(b'\0')
+        h.update(name.encode('UTF-8'))
+        h.update(b'\0')
+        h.update(hashlib.sha256(data).digest())
+    _salt = h.digest()
+    return _salt
+
+def get_key(path, data):
+    h = hashlib.sha256(get_salt())
+    # Tag arguments can mention the path (e.g. syntax-error for bad encoding),
+    # so the results can't be shared between files with the same contents.
+    path = utils.fsencode(path)
+    h.update(str(len(path)).encode('ASCII'))
+    h.update(b'\0')
+    h.update(path)
+    h.update(data)
+    return h.hexdigest()
+
+class Cache(object):
+
+    def __init__(self, path, size):
+        self.path = path
+        self.size = size
+
+    def _get_path(self, key):
+        return os.path.join(self.path, key[:2], key[2:])
+
+    def get(self, key):
+        path = self._get_path(key)
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+        except EnvironmentError as exc:
+            if exc.errno == errno.ENOENT:
+                return
+            raise
+        try:
+            value = marshal.loads(data)
+        except (EOFError, ValueError, TypeError):
+            return
+        try:
+            # mark the entry as recently used
+            os.utime(path, None)
+        except EnvironmentError:
+            pass
+        return value
+
+    def put(self, key, value):
+        try:
+            data = marshal.dumps(value)
+        except ValueError:
+            return
+        self._write(self._get_path(key), data)
+
+    def _write(self, path, data):
+        dirpath = os.path.dirname(path)
+        try:
+            os.makedirs(dirpath)
+        except EnvironmentError as exc:
+            if exc.errno != errno.EEXIST:
+                raise
+        # Other processes may be reading or writing the same entry.
+        utils.write_atomically(path, data)
+
+    def load_regexp_memo(self):
+        '''
+        return the regexp memo saved by save_regexp_memo() (see check_re.memo),
+        or an empty dict
+        '''
+        path = os.path.join(self.path, regexp_memo_name)
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+        except EnvironmentError as exc:
+            if exc.errno == errno.ENOENT:
+                return {}
+            raise
+        try:
+            salt, memo = marshal.loads(data)
+        except (EOFError, ValueError, TypeError):
+            return {}
+        if salt != get_salt() or not isinstance(memo, dict):
+            return {}
+        return memo
+
+    def save_regexp_memo(self, memo):
+        try:
+            data = marshal.dumps((get_salt(), memo))
+        except ValueError:
+            return
+        self._write(os.path.join(self.path, regexp_memo_name), data)
+
+    def _iter_entries(self):
+        try:
+            subdirs = os.listdir(self.path)
+        except EnvironmentError as exc:
+            if exc.errno == errno.ENOENT:
+                return
+            raise
+        for subdir in subdirs:
+            if len(subdir) != 2:
+                continue
+            subdir = os.path.join(self.path, subdir)
+            try:
+                names = os.listdir(subdir)
+            except EnvironmentError:
+                continue
+            for name in names:
+                if name.startswith('.'):
+                    continue
+                path = os.path.join(subdir, name)
+                try:
+                    mtime = os.stat(path).st_mtime
+                except EnvironmentError:
+                    continue
+                yield mtime, path
+
+    def prune(self):
+        '''
+        evict least recently used entries until the cache fits in its size
+        '''
+        entries = list(self._iter_entries())
+        n = len(entries) - self.size
+        if n <= 0:
+            return
+        entries.sort()
+        for _, path in entries[:n]:
+            try:
+                os.unlink(path)
+            except EnvironmentError as exc:
+                if exc.errno != errno.ENOENT:
+                    raise
+
+    def check_file(self, path, data=None):
+        '''
+        check the file, unless it's already in the cache;
+        return tuple of tags in the compact form (see Tag.as_tuple())
+        '''
+        if data is None:
+            with open(path, 'rb') as file:
+                data = file.read()
+        key = get_key(path, data)
+        value = self.get(key)
+        if value is None:
+            value = tuple(
+                t.as_tuple()
+                for t in checks.check_file(path, data=data)
+            )
+            self.put(key, value)
+        return value
+
+__all__ = ['Cache']
+
+# vim:ts=4 sts=4 sw=4 et
@@ -1,6 +1,6 @@
 # encoding=UTF-8
 
-# Copyright © 2014-2025 Jakub Wilk <jwilk@jwilk.net>
+# Copyright © 2014-2026 Jakub Wilk <jwilk@jwilk.net>
 #
 # Permission is hereby granted, free of charge, to any person obtaining a copy
 # of this software and associated documentation files (the “Software”), to deal
@@ -25,40 +25,66 @@ pydiatra re checks
 '''
 
 import ast
-import inspect
 import itertools
 import operator
 import re
 import sys
+import threading
 import warnings
 
 try:
+    import re._compiler as sre_compile  # pylint: disable=ungrouped-imports
     import re._parser as sre_parse  # pylint: disable=ungrouped-imports
 except ImportError:  # Python < 3.11
+    import sre_compile  # pylint: disable=deprecated-module
     import sre_parse  # pylint: disable=deprecated-module
 
+from . import profiling
 from . import tags
 from . import utils
 
 tag = tags.Tag
 
-def analyze_re_functions():
-    funcs = [
-        re.compile,
-        re.findall,
-        re.finditer,
-        re.match,
-        re.search,
-        re.split,
-        re.sub,
-        re.subn,
+re_function_names = [
+    'compile',
+    'findall',
+    'finditer',
+    'match',
+    'search',
+    'split',
+    'sub',
+    'subn',
+]
+if sys.version_info >= (3, 4):
+    re_function_names += [
+        'fullmatch'
     ]
-    if sys.version_info >= (3, 4):
-        funcs += [
-            re.fullmatch  # pylint: disable=no-member
-        ]
+re_function_names = frozenset(re_function_names)
+
+# tags that check_pattern() can emit
+pattern_tag_names = [
+    'regexp-bad-escape',
+    'regexp-duplicate-range',
+    'regexp-misplaced-inline-flags',
+    'regexp-overlapping-ranges',
+    'regexp-redundant-flag',
+    'regexp-syntax-error',
+    'regexp-syntax-warning',
+]
+
+# tags that check() can emit
+tag_names = pattern_tag_names + [
+    'regexp-incompatible-flags',
+    'regexp-misplaced-flags-argument',
+]
+
+def analyze_re_functions():
+    # This is needed only if the code being checked uses the re module,
+    # so import it only here.
+    import inspect  # pylint: disable=import-outside-toplevel
     data = {}
-    for func in funcs:
+    for func_name in sorted(re_function_names):
+        func = getattr(re, func_name)
         # pylint: disable=deprecated-method,no-member
         if sys.version_info < (3, 0):
             func_args = inspect.getargspec(func).args
@@ -77,8 +103,6 @@ def analyze_re_functions():
         data[func.__name__] = func_args
     return data
 
-re_functions = analyze_re_functions()
-
 # pylint: disable=redefined-builtin,self-assigning-variable
 if sys.version_info >= (3,):
     long = int
@@ -348,15 +372,15 @@ def check_bad_escape(escape, cls=False):
     if escape[1:] in ascii_letters:
         warnings.warn('bad escape {esc}'.format(esc=escape), category=DeprecationWarning)
 
-original_class_escape = sre_parse._class_escape  # pylint: disable=protected-access
+original_class_escape = None
 def my_class_escape(source, escape):
     check_bad_escape(escape, cls=True)
-    return original_class_escape(source, escape)  # pylint: disable=no-value-for-parameter
+    return original_class_escape(source, escape)  # pylint: disable=not-callable
 
-original_escape = sre_parse._escape  # pylint: disable=protected-access
+original_escape = None
 def my_escape(source, escape, state):
     check_bad_escape(escape)
-    return original_escape(source, escape, state)  # pylint: disable=no-value-for-parameter
+    return original_escape(source, escape, state)  # pylint: disable=not-callable
 
 class EscapeDict(dict):
     def __missing__(self, key):
@@ -364,13 +388,80 @@ class EscapeDict(dict):
             warnings.warn('bad escape {esc}'.format(esc=key), category=DeprecationWarning)
         raise KeyError(key)
 
-original_parse_template = sre_parse.parse_template
-original_ESCAPES = sre_parse.ESCAPES
-def my_parse_template(source, pattern):
-    with utils.monkeypatch(sre_parse, ESCAPES=EscapeDict(original_ESCAPES)):
-        return original_parse_template(source, pattern)
+# set by setup()
+re_functions = None
+
+setup_lock = threading.Lock()
+
+def setup():
+    '''
+    prepare for checking;
+    this is deferred until the first re.* call is seen,
+    because most files don't have any
+    '''
+    # pylint: disable=global-statement,protected-access,no-member
+    global sre_parse, original_class_escape, original_escape, re_functions
+    with setup_lock:
+        if re_functions is not None:
+            return
+        # The parser is modified below (in a thread-safe way),
+        # without affecting the re module.
+        sre_parse = utils.load_private_copy(sre_parse)
+        # The parser is a private copy, so it can be modified for good.
+        if enable_bad_escape_check:
+            original_class_escape = sre_parse._class_escape
+            original_escape = sre_parse._escape
+            sre_parse._class_escape = my_class_escape
+            sre_parse._escape = my_escape
+            # (Only parse_template() looks up missing keys in ESCAPES.)
+            sre_parse.ESCAPES = EscapeDict(sre_parse.ESCAPES)
+        if sys.version_info >= (3, 7):
+            # Keep duplicate set items, so that ReVisitor can complain about them.
+            sre_parse._uniq = list
+        re_functions = analyze_re_functions()
+
+# memo of check_pattern() results:
+# (pattern type name, pattern, flags, repl) -> tuple of tag args
+memo = {}
+memo_size = 10000
+# entries added since the last pop_memo_updates()
+memo_updates = {}
+
+def remember(key, results, update=True):
+    if len(memo) >= memo_size:
+        # Drop the oldest entry.
+        # (Other threads may be doing the same.)
+        try:
+            del memo[next(iter(memo))]
+        except (StopIteration, RuntimeError, KeyError):
+            pass
+    memo[key] = results
+    if update and len(memo_updates) < memo_size:
+        memo_updates[key] = results
+
+def update_memo(entries):
+    '''
+    add the entries (e.g. obtained from pop_memo_updates() in another process)
+    to the memo
+    '''
+    for key, results in entries.items():
+        remember(key, results, update=False)
+
+def pop_memo_updates():
+    '''
+    return the memo entries added since the last call
+    '''
+    global memo_updates  # pylint: disable=global-statement
+    updates = memo_updates
+    memo_updates = {}
+    return updates
 
 def check(owner, node):
+    func_name = node.func.attr
+    if func_name not in re_function_names:
+        return
+    if re_functions is None:
+        setup()
     if sys.version_info < (3, 5):
         if node.starargs:
             return
@@ -379,11 +470,7 @@ def check(owner, node):
         starred_tp = ()
     else:
         starred_tp = ast.Starred  # pylint: disable=no-member
-    func_name = node.func.attr
-    try:
-        argnames = re_functions[func_name]
-    except KeyError:
-        return
+    argnames = re_functions[func_name]  # pylint: disable=unsubscriptable-object
     if node.func.value.id != 're':
         # maybe a regexp method
         argnames = argnames[1:]
@@ -422,50 +509,56 @@ def check(owner, node):
             pass
         else:
             return
+    if owner.selection is not None and not owner.selection.any(pattern_tag_names):
+        return
     flags &= ~re.DEBUG
     check_sub = func_name.startswith('sub') and isinstance(repl, (unicode, str, bytes))
-    if enable_bad_escape_check:
-        monkey_context = utils.monkeypatch(sre_parse,
-            _class_escape=my_class_escape,
-            _escape=my_escape,
-            parse_template=my_parse_template,
+    if not check_sub:
+        repl = None
+    key = (type(pattern).__name__, pattern, int(flags), repl)
+    results = memo.get(key)
+    if results is None:
+        # Only the tag args are memoized; the locations are filled in below.
+        results = tuple(t.args for t in check_pattern(owner, node, pattern, flags, repl))
+        remember(key, results)
+    for args in results:
+        yield owner.tag(node, *args)
+
+def warn_about_flags(flags):
+    '''
+    emit the warnings that re.compile() emits about the flags
+    before handing the pattern over to sre_compile.compile()
+    '''
+    if (3, 11) <= sys.version_info < (3, 13) and (flags & re.TEMPLATE):  # pylint: disable=no-member
+        # the same as in re._compile()
+        warnings.warn("The re.TEMPLATE/re.T flag is deprecated "
+            "as it is an undocumented flag "
+            "without an obvious purpose. "
+            "Don't use it.",
+            DeprecationWarning,
         )
-    else:
-        # no-op context manager
-        monkey_context = utils.monkeypatch(None)
-    exc = None
-    with warnings.catch_warnings(record=True) as wrns:
-        warnings.simplefilter('default')
-        with monkey_context:
-            if check_sub:
-                if sys.version_info < (2, 7):
-                    # The flags argument was added to re.sub() only in 2.7.
-                    if flags == 0:
-                        with utils.catch_exceptions() as exc:
-                            re.sub(pattern, repl, pattern[:0])
-                    else:
-                        with utils.catch_exceptions() as exc:
-                            re.compile(pattern, flags=flags)
-                else:
-                    with utils.catch_exceptions() as exc:
-                        re.sub(pattern, repl, pattern[:0], flags=flags)
-            else:
-                with utils.catch_exceptions() as exc:
-                    re.compile(pattern, flags=flags)
-    subpattern = None  # hi, Pylint!
-    if not exc:
-        if sys.version_info >= (3, 7):
-            monkey_context = utils.monkeypatch(sre_parse,
-                _uniq=list,
-            )
-        else:
-            # no-op context manager
-            monkey_context = utils.monkeypatch(None)
-        with warnings.catch_warnings():
-            warnings.simplefilter('ignore')  # all warnings should have been caught beforehand
-            with utils.catch_exceptions() as exc:
-                with monkey_context:
-                    subpattern = sre_parse.parse(pattern, flags=flags)
+
+def check_pattern(owner, node, pattern, flags, repl=None):
+    '''
+    check the regexp pattern (and the re.sub() replacement, if not None)
+    '''
+    # Parse the pattern only once,
+    # and then compile (and, for re.sub(), expand the template)
+    # using the resulting parse tree.
+    subpattern = compiled = None  # hi, Pylint!
+    with utils.record_warnings() as wrns:
+        warn_about_flags(flags)
+        with profiling.timer('sre_parse.parse'), utils.catch_exceptions() as exc:
+            subpattern = sre_parse.parse(pattern, flags=flags)
+        if not exc:
+            with profiling.timer('sre_compile.compile'), utils.catch_exceptions() as exc:
+                compiled = sre_compile.compile(subpattern, flags)
+        if not exc and repl is not None:
+            with profiling.timer('re.sub'), utils.catch_exceptions() as exc:
+                if enable_bad_escape_check:
+                    # The re module's own template parser doesn't warn about bad escapes.
+                    sre_parse.parse_template(repl, compiled)
+                compiled.sub(repl, pattern[:0])
     if exc:
         msg = str(exc)
         if msg.startswith('global flags not at the start of the expression at position '):
@@ -474,8 +567,14 @@ def check(owner, node):
             yield owner.tag(node, 'regexp-syntax-error', msg)
         return
     assert subpattern is not None
+    seen_wrns = set()
     for wrn in wrns:
         message = str(wrn.message)
+        # record_warnings() doesn't suppress repeated warnings.
+        wrn_key = (message, wrn.category, wrn.filename, wrn.lineno)
+        if wrn_key in seen_wrns:
+            continue
+        seen_wrns.add(wrn_key)
         boring = (
             'LOCALE flag with a str pattern is deprecated.',
             'ASCII and LOCALE flags are incompatible.',
@@ -491,12 +590,20 @@ def check(owner, node):
         else:
             yield owner.tag(node, 'regexp-syntax-warning', message)
     re_visitor = ReVisitor(tp=type(pattern), path=owner.path, location=node)
-    for t in re_visitor.visit(subpattern):
+    with profiling.timer('ReVisitor'):
+        # The timed step must not yield, so collect the tags first.
+        re_tags = list(re_visitor.visit(subpattern))
+    for t in re_tags:
         yield t
     for name, flag in sorted(possibly_redundant_flags.items()):
         if (flag & get_subpattern_flags(subpattern)) and not (flag & re_visitor.justified_flags):  # pylint: disable=superfluous-parens
             yield owner.tag(node, 'regexp-redundant-flag', 're.' + name)
 
-__all__ = ['check']
+__all__ = [
+    'check',
+    'pop_memo_updates',
+    'tag_names',
+    'update_memo',
+]
 
 # vim:ts=4 sts=4 sw=4 et
@@ -1,6 +1,6 @@
 # encoding=UTF-8
 
-# Copyright © 2011-2025 Jakub Wilk <jwilk@jwilk.net>
+# Copyright © 2011-2026 Jakub Wilk <jwilk@jwilk.net>
 #
 # Permission is hereby granted, free of charge, to any person obtaining a copy
 # of this software and associated documentation files (the “Software”), to deal
@@ -25,16 +25,25 @@ pydiatra checks
 '''
 
 import ast
+import errno
+import functools
+import marshal
 import os
 import re
 import string
 import sys
+import unicodedata
 import warnings
+import zlib
 
+from . import __version__
 from . import astaux
 from . import tags
 from . import check_re
+from . import prefilter
+from . import profiling
 from . import sysversion
+from . import utils
 
 tag = tags.Tag
 
@@ -47,7 +56,7 @@ builtin_exception_types = set()
 pil_modules = set()
 errno_constants = {}
 code_copies = []
-code_copies_regexp = None
+code_copies_matcher = None
 
 def load_data_file(ident):
     path = '{dir}/{ident}'.format(dir=datadir, ident=ident)
@@ -63,24 +72,129 @@ def load_data_file(ident):
                 continue
             yield line
 
-def load_data():
-    global code_copies_regexp  # pylint: disable=global-statement
-    builtin_exception_types.update(
-        load_data_file('exceptions')
-    )
-    pil_modules.update(
-        load_data_file('pil-modules')
-    )
+def read_data():
+    '''
+    parse the data files;
+    return the results as a marshallable object
+    '''
+    errnos = {}
     for line in load_data_file('errno-constants'):
         n, code = line.split()
-        errno_constants[int(n)] = code
-    regexp = []
+        errnos[int(n)] = code
+    packages = []
+    regexps = []
     for line in load_data_file('embedded-code-copies'):
-        regexp += [None]
-        package, regexp[-1] = map(str.strip, line.split('||'))
-        code_copies.append(package)
-    regexp = str.join('|', ('(%s)' % r for r in regexp))
-    code_copies_regexp = re.compile(regexp, re.DOTALL)
+        package, regexp = map(str.strip, line.split('||'))
+        packages += [package]
+        regexps += [regexp]
+    matcher = prefilter.MultiMatcher(regexps, re.DOTALL)
+    return (
+        list(load_data_file('exceptions')),
+        list(load_data_file('pil-modules')),
+        errnos,
+        packages,
+        matcher.get_state(),
+    )
+
+# The parsed data files are saved in a bundle,
+# which is much faster to load than parsing them again.
+# The bundle lives in the user's cache directory,
+# because pydiatra's own directory is often read-only,
+# or managed by a package manager.
+bundle_dir = '{dir}/pydiatra'.format(
+    dir=(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'))
+)
+bundled_files = ['errno-constants', 'embedded-code-copies', 'exceptions', 'pil-modules']
+
+def get_bundle_path():
+    cache_tag = None
+    if sys.version_info >= (3, 3):
+        cache_tag = sys.implementation.cache_tag  # pylint: disable=no-member
+    if cache_tag is None:
+        cache_tag = 'python{0}{1}'.format(*sys.version_info)
+    return '{dir}/data.{tag}.marshal'.format(dir=bundle_dir, tag=cache_tag)
+
+def get_bundle_stamp():
+    '''
+    return object that changes when the data files change,
+    or when the code that produces or consumes the bundle changes
+    (or when pydiatra or Python is upgraded)
+    '''
+    paths = ['{dir}/{ident}'.format(dir=datadir, ident=ident) for ident in bundled_files]
+    # read_data() and the MultiMatcher state format:
+    paths += [__file__, prefilter.__file__]
+    # (This runs on every start-up, and hashlib is relatively expensive to import;
+    # a CRC is good enough to notice changes.)
+    crcs = []
+    for path in paths:
+        with open(path, 'rb') as file:
+            data = file.read()
+        crcs += [zlib.crc32(data) & 0xFFFFFFFF]
+    return [__version__, sys.version, crcs]
+
+def load_bundle():
+    '''
+    return the data saved by save_bundle(),
+    or None if there's no up-to-date bundle
+    '''
+    try:
+        with open(get_bundle_path(), 'rb') as file:
+            stamp, data = marshal.load(file)
+        if stamp != get_bundle_stamp():
+            return
+    except EnvironmentError:
+        return
+    except (EOFError, ValueError, TypeError):
+        return
+    return data
+
+def save_bundle(data):
+    try:
+        data = marshal.dumps((get_bundle_stamp(), data))
+        try:
+            os.makedirs(bundle_dir)
+        except EnvironmentError as exc:
+            if exc.errno != errno.EEXIST:
+                raise
+        utils.write_atomically(get_bundle_path(), data)
+    except (EnvironmentError, ValueError):
+        # The bundle is only an optimization.
+        pass
+
+def unpack_data(data):
+    '''
+    load the read_data() results into the module globals
+    '''
+    global code_copies_matcher  # pylint: disable=global-statement
+    exceptions, modules, errnos, packages, matcher_state = data
+    # (Convert everything first, so that nothing is modified
+    # if the data is malformed.)
+    exceptions = frozenset(exceptions)
+    modules = frozenset(modules)
+    errnos = dict(errnos)
+    packages = list(packages)
+    matcher = prefilter.MultiMatcher.from_state(matcher_state)
+    builtin_exception_types.update(exceptions)
+    pil_modules.update(modules)
+    errno_constants.update(errnos)
+    code_copies.extend(packages)
+    code_copies_matcher = matcher
+
+def load_data():
+    if code_copies_matcher is not None:
+        # already loaded
+        return
+    data = load_bundle()
+    if data is not None:
+        try:
+            unpack_data(data)
+        except Exception:  # pylint: disable=broad-except
+            # The bundle is broken; rebuild it.
+            data = None
+    if data is None:
+        data = read_data()
+        save_bundle(data)
+        unpack_data(data)
 
 def format_cmp(left, op, right, swap=False):
     op = astaux.cmp_ops[op]
@@ -116,350 +230,564 @@ def ast_num(node, fallback=None):
 def ast_is_num(node):
     return ast_num(node) is not None
 
-class Visitor(ast.NodeVisitor):
+# (function, names of node types, names of tags or None, trigger regexps or None) tuples,
+# in order of registration
+registered_checks = []
+
+# frozenset of skipped check functions ->
+# node type -> (check functions, names of fields in reverse order)
+dispatch_tables = {}
+
+# check function -> compiled trigger regexps
+trigger_regexps = {}
+
+# tags to report (tags.Selection), or None for all
+selection = None
+
+def register(*node_types, **kwargs):
+    '''
+    return decorator that registers function(owner, node)
+    as a check for syntax tree nodes of the named types (e.g. "Call");
+    the function reports issues by appending tags to owner.tags,
+    where owner is a Visitor;
+    it returns True if it has taken care of visiting the children of the node
+
+    If the tags keyword argument is given,
+    the check is run only if any of the named tags is selected.
+
+    If the triggers keyword argument is given,
+    the check is run only on files whose source code matches any of these regexps.
+    The regexps are searched for in the whole file, including comments,
+    so they should be cheap: ideally, they should start with a literal string.
+    '''
+    tag_names = kwargs.pop('tags', None)
+    triggers = kwargs.pop('triggers', None)
+    if kwargs:
+        raise TypeError('unexpected keyword argument {arg!r}'.format(arg=min(kwargs)))
+    if tag_names is not None:
+        tag_names = frozenset(tag_names)
+    def decorator(func):
+        registered_checks.append((func, frozenset(node_types), tag_names, triggers))
+        clear_dispatch_tables()
+        return func
+    return decorator
+
+def clear_dispatch_tables():
+    dispatch_tables.clear()
+    trigger_regexps.clear()
+
+def select(new_selection):
+    '''
+    report only the tags from the selection (tags.Selection, or None for all);
+    checks that can't emit any of them are not run
+    '''
+    global selection  # pylint: disable=global-statement
+    selection = new_selection
+    clear_dispatch_tables()
+
+def is_wanted(tag_names):
+    return selection is None or tag_names is None or selection.any(tag_names)
+
+# tags that are only found by compiling the syntax tree to bytecode:
+# those emitted by check_warnings(),
+# and syntax-error for code that parses, but doesn't compile
+# (e.g. "return" outside function)
+compile_tag_names = [
+    'assertion-always-true',
+    'async-await-used-as-name',
+    'py3k-compat-warning',
+    'syntax-error',
+    'syntax-warning',
+]
 
-    def __init__(self, path):
+def get_check_name(func):
+    return '{mod}.{func}'.format(mod=func.__module__.rpartition('.')[2], func=func.__name__)
+
+def instrument_checks():
+    '''
+    time the registered checks
+    '''
+    for i, (func, node_types, tag_names, triggers) in enumerate(registered_checks):
+        registered_checks[i] = (profiling.wrap_function(get_check_name(func), func), node_types, tag_names, triggers)
+    clear_dispatch_tables()
+
+if sys.version_info >= (3, 7):
+    def is_ascii(s):
+        return s.isascii()
+else:
+    def is_ascii(s):
+        return re.search(r'[^\0-\x7F]', s) is None
+
+if sys.version_info >= (3, 8):
+    def is_nfkc(s):
+        return unicodedata.is_normalized('NFKC', s)  # pylint: disable=no-member
+else:
+    def is_nfkc(s):  # pylint: disable=unused-argument
+        return False
+
+def get_skipped_checks(source):
+    '''
+    return frozenset of the checks that can't find anything in the source code,
+    because it doesn't match any of their trigger regexps
+    '''
+    if sys.version_info >= (3,) and not is_ascii(source):
+        # The parser normalizes identifiers to NFKC.
+        if not is_nfkc(source):
+            source = unicodedata.normalize('NFKC', source)
+    skipped = []
+    for func, _, tag_names, triggers in registered_checks:
+        if triggers is None or not is_wanted(tag_names):
+            continue
+        try:
+            regexps = trigger_regexps[func]
+        except KeyError:
+            regexps = trigger_regexps[func] = [re.compile(trigger) for trigger in triggers]
+        if all(regexp.search(source) is None for regexp in regexps):
+            skipped += [func]
+    skipped = frozenset(skipped)
+    if profiling.enabled():
+        for func in skipped:
+            profiling.count(get_check_name(func) + '-skipped')
+    return skipped
+
+def get_dispatch_entry(tp, skipped=frozenset()):
+    funcs = tuple(
+        func
+        for func, node_types, tag_names, _ in registered_checks
+        if tp.__name__ in node_types and is_wanted(tag_names) and func not in skipped
+    )
+    # The expression context nodes (ast.Load etc.) are not interesting,
+    # so don't visit them.
+    fields = tuple(field for field in reversed(tp._fields) if field != 'ctx')
+    return funcs, fields
+
+class Visitor(object):
+    '''
+    syntax tree visitor
+
+    The tree is walked with an explicit stack rather than recursively,
+    and the tags are appended to a single list.
+    Nodes are passed to the checks registered for their type, if any;
+    unless one of them returns True, the children of the node are then visited.
+    '''
+
+    def __init__(self, path, source=None):
         class state:  # pylint: disable=no-init,old-style-class
             code_copy = False
         self.state = state
         self.path = path
-
-    def generic_visit(self, node):
-        for child in ast.iter_child_nodes(node):
-            for t in self.visit(child):
-                yield t
+        self.selection = selection
+        self.skipped = frozenset()
+        if source is not None:
+            with profiling.timer('prefilter'):
+                self.skipped = get_skipped_checks(source)
+        try:
+            self._table = dispatch_tables[self.skipped]
+        except KeyError:
+            self._table = dispatch_tables[self.skipped] = {}
+        self.tags = []
+        # nodes to visit and callables to call, in reverse order
+        self._stack = []
+
+    def visit(self, node):
+        '''
+        visit the node and its descendants;
+        return the list of tags
+        '''
+        AST = ast.AST
+        table = self._table
+        stack = self._stack
+        pop = stack.pop
+        base = len(stack)
+        stack += [node]
+        while len(stack) > base:
+            item = pop()
+            try:
+                funcs, fields = table[type(item)]
+            except KeyError:
+                if not isinstance(item, AST):
+                    item()
+                    continue
+                funcs, fields = table[type(item)] = get_dispatch_entry(type(item), self.skipped)
+            # (All the checks must run, so any() mustn't short-circuit.)
+            if funcs and any([func(self, item) for func in funcs]):  # pylint: disable=use-a-generator
+                continue
+            # This is equivalent to ast.iter_child_nodes(), but much faster.
+            for field in fields:
+                value = getattr(item, field, None)
+                if isinstance(value, AST):
+                    stack += [value]
+                elif isinstance(value, list):
+                    stack += [child for child in reversed(value) if isinstance(child, AST)]
+        return self.tags
+
+    def schedule(self, items):
+        '''
+        visit the nodes and call the callables from the list, in order,
+        after the current check returns
+        '''
+        self._stack += reversed(items)
+
+    def capturing(self, nodes, callback):
+        '''
+        return list of items for schedule()
+        that visit the nodes, and then call callback(tags),
+        where tags is the list of the tags emitted meanwhile;
+        the callback returns the list of tags to keep
+        '''
+        start = [None]
+        def begin():
+            start[0] = len(self.tags)
+        def end():
+            i = start[0]
+            self.tags[i:] = callback(self.tags[i:])
+        return [begin] + list(nodes) + [end]
 
     def tag(self, location, *args):
         return tag(self.path, location, *args)
 
-    def visit_Raise(self, node):
-        try:
-            ex_type = node.type
-        except AttributeError:
-            ex_type = node.exc
-        if ex_type is None:
-            yield self.tag(None, '*reraise')
+@register('Raise', tags=['string-exception', 'bare-except'])
+def check_raise(owner, node):
+    try:
+        ex_type = node.type
+    except AttributeError:
+        ex_type = node.exc
+    if ex_type is None:
+        owner.tags += [owner.tag(None, '*reraise')]
+    while isinstance(ex_type, ast.BinOp):
+        ex_type = ex_type.left
+    if ast_is_str(ex_type):
+        owner.tags += [owner.tag(node, 'string-exception')]
+
+@register('ExceptHandler', tags=['except-shadows-builtin', 'string-exception'])
+def check_except_handler(owner, node):
+    node_name = None
+    if isinstance(node.name, ast.Name):
+        # Python 2
+        node_name = node.name.id
+    elif isinstance(node.name, str):
+        # Python 3
+        node_name = node.name
+    if node_name in builtin_exception_types:
+        owner.tags += [owner.tag(node, 'except-shadows-builtin', node_name)]
+    if node.type is None:
+        ex_types = []
+    elif isinstance(node.type, ast.Tuple):
+        ex_types = list(node.type.elts)
+    else:
+        ex_types = [node.type]
+    for ex_type in ex_types:
         while isinstance(ex_type, ast.BinOp):
             ex_type = ex_type.left
         if ast_is_str(ex_type):
-            yield self.tag(node, 'string-exception')
-        for t in self.generic_visit(node):
-            yield t
-
-    def visit_ExceptHandler(self, node):
-        node_name = None
-        if isinstance(node.name, ast.Name):
-            # Python 2
-            node_name = node.name.id
-        elif isinstance(node.name, str):
-            # Python 3
-            node_name = node.name
-        if node_name in builtin_exception_types:
-            yield self.tag(node, 'except-shadows-builtin', node_name)
-        if node.type is None:
-            ex_types = []
-        elif isinstance(node.type, ast.Tuple):
-            ex_types = list(node.type.elts)
-        else:
-            ex_types = [node.type]
-        for ex_type in ex_types:
-            while isinstance(ex_type, ast.BinOp):
-                ex_type = ex_type.left
-            if ast_is_str(ex_type):
-                yield self.tag(node, 'string-exception')
-                break
-        for t in self.generic_visit(node):
-            yield t
-
-    def visit_Import(self, node):
+            owner.tags += [owner.tag(node, 'string-exception')]
+            break
+
+@register('Import', tags=['obsolete-pil-import'])
+def check_import(owner, node):
+    imp_modules = frozenset(mod.name for mod in node.names)
+    imp_pil_modules = imp_modules & pil_modules
+    for mod in sorted(imp_pil_modules):
+        owner.tags += [owner.tag(node, 'obsolete-pil-import', mod)]
+    imp_pil_modules = (
+        frozenset(mod[4:] for mod in imp_modules if mod.startswith('PIL.'))
+        & pil_modules
+    )
+    for mod in sorted(imp_pil_modules):
+        owner.tags += [owner.tag(node, '*modern-pil-import', mod)]
+
+@register('ImportFrom', tags=['obsolete-pil-import'])
+def check_import_from(owner, node):
+    if node.level == 0 and node.module in pil_modules:
+        owner.tags += [owner.tag(node, 'obsolete-pil-import', node.module)]
+    elif node.level == 0 and node.module == 'PIL':
         imp_modules = frozenset(mod.name for mod in node.names)
         imp_pil_modules = imp_modules & pil_modules
         for mod in sorted(imp_pil_modules):
-            yield self.tag(node, 'obsolete-pil-import', mod)
-        imp_pil_modules = (
-            frozenset(mod[4:] for mod in imp_modules if mod.startswith('PIL.'))
-            & pil_modules
-        )
-        for mod in sorted(imp_pil_modules):
-            yield self.tag(node, '*modern-pil-import', mod)
-        for t in self.generic_visit(node):
-            yield t
+            owner.tags += [owner.tag(node, '*modern-pil-import', mod)]
 
-    def visit_ImportFrom(self, node):
-        if node.level == 0 and node.module in pil_modules:
-            yield self.tag(node, 'obsolete-pil-import', node.module)
-        elif node.level == 0 and node.module == 'PIL':
-            imp_modules = frozenset(mod.name for mod in node.names)
-            imp_pil_modules = imp_modules & pil_modules
-            for mod in sorted(imp_pil_modules):
-                yield self.tag(node, '*modern-pil-import', mod)
-        for t in self.generic_visit(node):
-            yield t
-
-    def _visit_compare(self, left, op, right):
-        swap = False
-        if not isinstance(left, ast.Attribute):
-            left, right = right, left
-            swap = True
-        if not isinstance(left, ast.Attribute):
-            return
-        hardcoded_errno = (
-            left.attr == 'errno' and
-            op in astaux.equality_ops and
-            ast_num(right) in errno_constants
-        )
-        if hardcoded_errno:
-            yield self.tag(right, '*hardcoded-errno-value', ast_num(right))
-        sys_attr_comparison = (
-            isinstance(left.value, ast.Name) and
-            left.value.id == 'sys'
-        )
-        if sys_attr_comparison:
-            if left.attr == 'version':
-                tpl = None
-                right_s = ast_str(right)
-                if right_s is not None:
-                    if op in astaux.inequality_ops:
-                        try:
-                            tpl = sysversion.version_to_tuple(right_s)
-                        except (TypeError, ValueError):
-                            pass
-                    elif swap and (op in astaux.in_ops):
-                        if right_s == 'PyPy':
-                            tpl = False
-                            op = ast.Eq if isinstance(op, ast.In) else ast.NotEq
-                            yield self.tag(left, 'sys.version-comparison',
-                                format_cmp('platform.python_implementation()', op, repr('PyPy'))
-                            )
-                if tpl is False:
-                    pass
-                elif tpl is None:
-                    yield self.tag(left, 'sys.version-comparison')
-                else:
-                    yield self.tag(left, 'sys.version-comparison',
-                        format_cmp('sys.version_info', op, tpl, swap=swap)
-                    )
-            elif left.attr == 'hexversion':
-                tpl = None
-                right_n = ast_num(right)
-                if right_n is not None and (op in astaux.numeric_cmp_ops):
+def check_comparison(owner, left, op, right):
+    swap = False
+    if not isinstance(left, ast.Attribute):
+        left, right = right, left
+        swap = True
+    if not isinstance(left, ast.Attribute):
+        return
+    hardcoded_errno = (
+        left.attr == 'errno' and
+        op in astaux.equality_ops and
+        ast_num(right) in errno_constants
+    )
+    if hardcoded_errno:
+        yield owner.tag(right, '*hardcoded-errno-value', ast_num(right))
+    sys_attr_comparison = (
+        isinstance(left.value, ast.Name) and
+        left.value.id == 'sys'
+    )
+    if sys_attr_comparison:
+        if left.attr == 'version':
+            tpl = None
+            right_s = ast_str(right)
+            if right_s is not None:
+                if op in astaux.inequality_ops:
                     try:
-                        tpl = sysversion.hexversion_to_tuple(right_n)
+                        tpl = sysversion.version_to_tuple(right_s)
                     except (TypeError, ValueError):
                         pass
-                if tpl is None:
-                    yield self.tag(left, 'sys.hexversion-comparison')
-                else:
-                    yield self.tag(left, 'sys.hexversion-comparison',
-                        format_cmp('sys.version_info', op, tpl, swap=swap)
-                    )
-
-    def visit_Compare(self, node):
-        left = node.left
-        for op, right in zip(node.ops, node.comparators):
-            for t in self._visit_compare(left, op, right):
-                yield t
-            left = right
-        for t in self.generic_visit(node):
-            yield t
-
-    def visit_TryExcept(self, node):
-        body_modern_pil_imp = set()
-        except_modern_pil_imp = set()
-        pending_body_tags = []
-        pending_except_tags = []
-        for child in node.body:
-            for t in self.visit(child):
-                if t.name == 'obsolete-pil-import':
-                    pending_body_tags += [t]
-                    continue
-                if t.name == '*modern-pil-import':
-                    [_, mod] = t.args
-                    body_modern_pil_imp.add(mod)
-                yield t
-        for child in node.handlers:
-            reraised = False
-            for t in self.visit(child):
-                if t.name == 'obsolete-pil-import':
-                    pending_except_tags += [t]
-                    continue
-                if t.name == '*modern-pil-import':
-                    [_, mod] = t.args
-                    except_modern_pil_imp.add(mod)
-                if t.name == '*hardcoded-errno-value':
-                    [_, n] = t.args
-                    code = errno_constants[n]
-                    yield self.tag(t, 'hardcoded-errno-value', n, '->', 'errno.{code}'.format(code=code))
-                if t.name == '*reraise':
-                    reraised = True
-                yield t
-            if child.type is None and not reraised:
-                yield self.tag(child, 'bare-except')
+                elif swap and (op in astaux.in_ops):
+                    if right_s == 'PyPy':
+                        tpl = False
+                        op = ast.Eq if isinstance(op, ast.In) else ast.NotEq
+                        yield owner.tag(left, 'sys.version-comparison',
+                            format_cmp('platform.python_implementation()', op, repr('PyPy'))
+                        )
+            if tpl is False:
+                pass
+            elif tpl is None:
+                yield owner.tag(left, 'sys.version-comparison')
+            else:
+                yield owner.tag(left, 'sys.version-comparison',
+                    format_cmp('sys.version_info', op, tpl, swap=swap)
+                )
+        elif left.attr == 'hexversion':
+            tpl = None
+            right_n = ast_num(right)
+            if right_n is not None and (op in astaux.numeric_cmp_ops):
+                try:
+                    tpl = sysversion.hexversion_to_tuple(right_n)
+                except (TypeError, ValueError):
+                    pass
+            if tpl is None:
+                yield owner.tag(left, 'sys.hexversion-comparison')
+            else:
+                yield owner.tag(left, 'sys.hexversion-comparison',
+                    format_cmp('sys.version_info', op, tpl, swap=swap)
+                )
+
+@register('Compare',
+    tags=['hardcoded-errno-value', 'sys.version-comparison', 'sys.hexversion-comparison'],
+    triggers=['errno', 'sys'],
+)
+def check_compare(owner, node):
+    left = node.left
+    for op, right in zip(node.ops, node.comparators):
+        owner.tags += check_comparison(owner, left, op, right)
+        left = right
+
+@register('TryExcept', 'Try', tags=['bare-except', 'hardcoded-errno-value', 'obsolete-pil-import'])
+def check_try(owner, node):
+    body_modern_pil_imp = set()
+    except_modern_pil_imp = set()
+    pending_body_tags = []
+    pending_except_tags = []
+    def filter_body_tags(captured):
+        result = []
+        for t in captured:
+            if t.name == 'obsolete-pil-import':
+                pending_body_tags.append(t)
+                continue
+            if t.name == '*modern-pil-import':
+                [_, mod] = t.args
+                body_modern_pil_imp.add(mod)
+            result += [t]
+        return result
+    def filter_handler_tags(child, captured):
+        result = []
+        reraised = False
+        for t in captured:
+            if t.name == 'obsolete-pil-import':
+                pending_except_tags.append(t)
+                continue
+            if t.name == '*modern-pil-import':
+                [_, mod] = t.args
+                except_modern_pil_imp.add(mod)
+            if t.name == '*hardcoded-errno-value':
+                [_, n] = t.args
+                code = errno_constants[n]
+                result += [owner.tag(t, 'hardcoded-errno-value', n, '->', 'errno.{code}'.format(code=code))]
+            if t.name == '*reraise':
+                reraised = True
+            result += [t]
+        if child.type is None and not reraised:
+            result += [owner.tag(child, 'bare-except')]
+        return result
+    def add_pending_tags():
         for t in pending_body_tags:
             [_, mod] = t.args
             if mod not in except_modern_pil_imp:
-                yield t
+                owner.tags += [t]
         for t in pending_except_tags:
             [_, mod] = t.args
             if mod not in body_modern_pil_imp:
-                yield t
-        for child in node.orelse:
-            for t in self.visit(child):
-                yield t
-
-    visit_Try = visit_TryExcept
-
-    def visit_Subscript(self, node):
-        func = None
-        if isinstance(node.value, ast.Call):
-            call = node.value
-            if isinstance(call.func, ast.Name):
-                func = call.func.id
-            elif isinstance(node.value.func, ast.Attribute):
-                func = call.func.attr
-        if func == 'mkstemp':
-            index = None
-            if isinstance(node.slice, ast.Index):
-                index = node.slice.value
-            elif ast_is_num(node.slice):
-                index = node.slice
-            if ast_num(index) == 1:
-                yield self.tag(node, 'mkstemp-file-descriptor-leak')
-        for t in self.generic_visit(node):
-            yield t
+                owner.tags += [t]
+    items = owner.capturing(node.body, filter_body_tags)
+    for child in node.handlers:
+        items += owner.capturing([child], functools.partial(filter_handler_tags, child))
+    items += [add_pending_tags]
+    items += node.orelse
+    owner.schedule(items)
+    # The children were taken care of above.
+    return True
+
+@register('Subscript', tags=['mkstemp-file-descriptor-leak'], triggers=['mkstemp'])
+def check_subscript(owner, node):
+    func = None
+    if isinstance(node.value, ast.Call):
+        call = node.value
+        if isinstance(call.func, ast.Name):
+            func = call.func.id
+        elif isinstance(node.value.func, ast.Attribute):
+            func = call.func.attr
+    if func == 'mkstemp':
+        index = None
+        if isinstance(node.slice, ast.Index):
+            index = node.slice.value
+        elif ast_is_num(node.slice):
+            index = node.slice
+        if ast_num(index) == 1:
+            owner.tags += [owner.tag(node, 'mkstemp-file-descriptor-leak')]
+
+def check_str(owner, s):
+    if not s:
+        return
+    if owner.state.code_copy:
+        return
+    if code_copies_matcher is None:
+        return
+    with profiling.timer('code-copies'):
+        i = code_copies_matcher.search(s)
+    if i is None:
+        return
+    owner.tags += [owner.tag(None, 'embedded-code-copy', code_copies[i])]
+    owner.state.code_copy = True
 
-    def check_str(self, s):
-        if not s:
-            return
-        if self.state.code_copy:
-            return
-        if code_copies_regexp is None:
-            return
-        match = code_copies_regexp.search(s)
-        if match is None:
-            return
-        for match, info in zip(match.groups(), code_copies):
-            if match is not None:
-                break
-        else:
-            info = None
-        if info is not None:
-            yield self.tag(None, 'embedded-code-copy', info)
-            self.state.code_copy = True
-
-    def visit_Constant(self, node):
-        s = ast_str(node)
-        if s is None:
-            return
-        for t in self.check_str(s):
-            yield t
+@register('Constant', 'Str', tags=['embedded-code-copy'])
+def check_constant(owner, node):
+    s = ast_str(node)
+    if s is None:
+        return
+    check_str(owner, s)
 
-    visit_Str = visit_Constant
+@register('BinOp', tags=['string-formatting-error'], triggers=['%'])
+def check_binop(owner, node):
+    if isinstance(node.op, ast.Mod):
+        owner.tags += check_string_formatting(owner, node)
 
-    def visit_BinOp(self, node):
-        fn = getattr(self,
-            'visit_BinOp_' + node.op.__class__.__name__,
-            self.generic_visit
+def check_string_formatting(owner, node):
+    [lhs, rhs] = [node.left, node.right]
+    lhs = ast_str(lhs)
+    if lhs is None:
+        return
+    if isinstance(rhs, ast.Tuple):
+        if sys.version_info >= (3, 5):
+            if any(isinstance(elt, ast.Starred) for elt in rhs.elts):  # pylint: disable=no-member
+                return
+        rhs = tuple(
+            ast_str(elt, 0)
+            for elt in rhs.elts
         )
-        return fn(node)
-
-    def visit_BinOp_Mod(self, node):
-        for t in self._check_string_formatting(node):
-            yield t
-        for t in self.generic_visit(node):
-            yield t
-
-    def _check_string_formatting(self, node):
-        [lhs, rhs] = [node.left, node.right]
-        lhs = ast_str(lhs)
-        if lhs is None:
-            return
-        if isinstance(rhs, ast.Tuple):
-            if sys.version_info >= (3, 5):
-                if any(isinstance(elt, ast.Starred) for elt in rhs.elts):  # pylint: disable=no-member
-                    return
-            rhs = tuple(
-                ast_str(elt, 0)
-                for elt in rhs.elts
-            )
-        elif isinstance(rhs, ast.Dict):
-            new_rhs = {}
-            for key, value in zip(rhs.keys, rhs.values):
-                key = ast_str(key)
-                if key is None:
-                    return
-                value = ast_str(value, 0)
-                new_rhs[key] = value
-            rhs = new_rhs
-        else:
-            rhs_s = ast_str(rhs)
-            if rhs_s is not None:
-                rhs = rhs_s
-            elif ast_is_num(rhs):
-                rhs = 0
-            else:
+    elif isinstance(rhs, ast.Dict):
+        new_rhs = {}
+        for key, value in zip(rhs.keys, rhs.values):
+            key = ast_str(key)
+            if key is None:
                 return
+            value = ast_str(value, 0)
+            new_rhs[key] = value
+        rhs = new_rhs
+    else:
+        rhs_s = ast_str(rhs)
+        if rhs_s is not None:
+            rhs = rhs_s
+        elif ast_is_num(rhs):
+            rhs = 0
+        else:
+            return
+    try:
+        lhs % rhs
+    except KeyError as exc:
+        yield owner.tag(node, 'string-formatting-error', 'missing key', str(exc))
+    except MemoryError:
+        # not a problem with the code;
+        # let the caller deal with it
+        raise
+    except Exception as exc:  # pylint: disable=broad-except
+        yield owner.tag(node, 'string-formatting-error', str(exc))
+
+@register('Call', tags=['string-formatting-error'], triggers=['format'])
+def check_str_format_call(owner, node):
+    func = node.func
+    if isinstance(func, ast.Attribute) and ast_is_str(func.value) and func.attr == 'format':
+        fstring = ast_str(func.value)
         try:
-            lhs % rhs
-        except KeyError as exc:
-            yield self.tag(node, 'string-formatting-error', 'missing key', str(exc))
+            fstring = list(string_formatter.parse(fstring))
         except Exception as exc:  # pylint: disable=broad-except
-            yield self.tag(node, 'string-formatting-error', str(exc))
-
-    def visit_Call(self, node):
-        func = node.func
-        if isinstance(func, ast.Attribute) and ast_is_str(func.value) and func.attr == 'format':
-            fstring = ast_str(func.value)
-            try:
-                fstring = list(string_formatter.parse(fstring))
-            except Exception as exc:  # pylint: disable=broad-except
-                yield self.tag(node, 'string-formatting-error', str(exc))
-            else:
-                for (literal_text, field_name, format_spec, conversion) in fstring:
-                    del literal_text, field_name, format_spec
-                    try:
-                        string_formatter.convert_field(0, conversion)
-                    except ValueError as exc:
-                        message = str(exc)
-                        message = re.sub(
-                            # https://github.com/python/cpython/commit/7b2a7710ef17e38e021f6f045b8cd7ad0e96d5e1
-                            '^Unknown convers?ion ',
-                            'unknown conversion ',
-                            message
-                        )
-                        yield self.tag(node, 'string-formatting-error', message)
-                    except Exception as exc:  # pylint: disable=broad-except
-                        yield self.tag(node, 'string-formatting-error', str(exc))
-        if isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name):
-            for t in check_re.check(self, node):
-                yield t
-        for t in self.generic_visit(node):
-            yield t
-
-    def visit_Module(self, node):
-        if sys.version_info >= (3, 7):
-            docstring = ast.get_docstring(node, clean=False)
-            for t in self.check_str(docstring):
-                yield t
-        for t in self.generic_visit(node):
-            yield t
-
-    visit_AsyncFunctionDef = visit_FunctionDef = visit_ClassDef = visit_Module
-
-    def visit_Name(self, node):
-        if sys.version_info < (3, 6):
-            if node.id in ('async', 'await'):
-                yield self.tag(node, 'async-await-used-as-name')
-        for t in self.generic_visit(node):
-            yield t
-
-def check_node(path, node):
-    return Visitor(path=path).visit(node)
-
-def check_file(path):
+            owner.tags += [owner.tag(node, 'string-formatting-error', str(exc))]
+        else:
+            for (literal_text, field_name, format_spec, conversion) in fstring:
+                del literal_text, field_name, format_spec
+                try:
+                    string_formatter.convert_field(0, conversion)
+                except ValueError as exc:
+                    message = str(exc)
+                    message = re.sub(
+                        # https://github.com/python/cpython/commit/7b2a7710ef17e38e021f6f045b8cd7ad0e96d5e1
+                        '^Unknown convers?ion ',
+                        'unknown conversion ',
+                        message
+                    )
+                    owner.tags += [owner.tag(node, 'string-formatting-error', message)]
+                except Exception as exc:  # pylint: disable=broad-except
+                    owner.tags += [owner.tag(node, 'string-formatting-error', str(exc))]
+
+# The regexp checks need either re.* calls or flags,
+# or the pattern passed as keyword argument to a regexp method.
+# There can be whitespace, line continuations, closing parentheses
+# or even comments between "re" and the dot.
+@register('Call', tags=check_re.tag_names, triggers=[r're[\s\\)]*[.#]', 'pattern'])
+def check_re_call(owner, node):
+    func = node.func
+    if isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name):
+        owner.tags += check_re.check(owner, node)
+
+def check_docstring(owner, node):
+    docstring = ast.get_docstring(node, clean=False)
+    check_str(owner, docstring)
+
+if sys.version_info >= (3, 7):
+    # In older Python versions, docstrings are ordinary string nodes.
+    register('Module', 'FunctionDef', 'AsyncFunctionDef', 'ClassDef', tags=['embedded-code-copy'])(check_docstring)
+
+def check_name(owner, node):
+    if node.id in ('async', 'await'):
+        owner.tags += [owner.tag(node, 'async-await-used-as-name')]
+
+if sys.version_info < (3, 6):
+    # Python >= 3.6 warns about it itself (see check_warnings()).
+    register('Name', tags=['async-await-used-as-name'], triggers=['async', 'await'])(check_name)
+
+def check_node(path, node, source=None):
+    '''
+    check the syntax tree;
+    if the source code is given, skip the checks that can't find anything in it
+    '''
+    with profiling.timer('visit'):
+        return Visitor(path=path, source=source).visit(node)
+
+def check_file(path, data=None):
+    result = _check_file(path, data=data)
+    if selection is not None:
+        result = (t for t in result if t.name in selection)
+    return result
+
+def _check_file(path, data=None):
     try:
-        with astaux.python_open(path) as file:
-            source = file.read()
+        with profiling.timer('read'):
+            if data is None:
+                with astaux.python_open(path) as file:
+                    source = file.read()
+            else:
+                source = astaux.python_decode(data, path)
     except SyntaxError as exc:
         yield tag(path, exc, 'syntax-error', exc.msg)
         return
@@ -489,10 +817,20 @@ def check_source(path, source, catch_tab_errors=True):
                 stacklevel=2,
             )
     try:
-        with warnings.catch_warnings(record=True) as wrns:
-            warnings.simplefilter('default')
-            ast_source = ast.parse(source, filename=path)
-            compile(ast_source, path, 'exec')
+        with utils.record_warnings() as wrns:
+            with profiling.timer('ast.parse'):
+                ast_source = ast.parse(source, filename=path)
+            if is_wanted(compile_tag_names):
+                with profiling.timer('compile'):
+                    # Compiling the already parsed tree is cheaper
+                    # than compiling the source code.
+                    compile(ast_source, path, 'exec')
+                profiling.add_size('compile', len(source))
+            else:
+                # The size of the code that wasn't compiled
+                # gives an idea of how much time was saved.
+                profiling.count('compile-skipped')
+                profiling.add_size('compile-skipped', len(source))
     except TabError as exc:
         if catch_tab_errors:
             source = source.expandtabs()
@@ -506,12 +844,14 @@ def check_source(path, source, catch_tab_errors=True):
     except SyntaxError as exc:
         yield tag(path, exc.lineno or None, 'syntax-error', exc.msg)
         return
+    except MemoryError:
+        raise
     except Exception as exc:  # pylint: disable=broad-except
         yield tag(path, None, 'syntax-error', str(exc))
         return
     for t in check_warnings(path, wrns):
         yield t
-    for t in check_node(path, ast_source):
+    for t in check_node(path, ast_source, source=source):
         if not t.private:
             yield t
 
@@ -527,9 +867,26 @@ def check_warnings(path, wrns):
         else:
             yield tag(path, wrn, 'syntax-warning', message)
 
+def resource_limit_tag(path, resource):
+    '''
+    return tag for the file that couldn't be checked
+    because checking exceeded the resource limit
+    '''
+    return tag(path, None, 'resource-limit-exceeded', resource)
+
+def internal_error_tag(path, message):
+    '''
+    return tag for the file that couldn't be checked
+    because pydiatra crashed
+    '''
+    return tag(path, None, 'internal-error', message)
+
 __all__ = [
     'check_file',
+    'internal_error_tag',
     'load_data',
+    'register',
+    'resource_limit_tag',
 ]
 
 # vim:ts=4 sts=4 sw=4 et
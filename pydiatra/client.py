@@ -0,0 +1,107 @@
+# encoding=UTF-8
+
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+'''
+thin client for the pydiatra check daemon:
+
+python -m pydiatra.client [-v] [--stdin-name NAME] SOCKET FILE-OR-DIR...
+'''
+
+from __future__ import print_function
+
+import os
+import socket
+import sys
+
+from . import daemon
+
+usage = '[-v] [--stdin-name NAME] SOCKET FILE-OR-DIR...'
+
+def read_stdin():
+    if str is bytes:
+        return sys.stdin.read()
+    return sys.stdin.buffer.read()
+
+def check_locally(request):
+    # This is slow, but better than nothing.
+    from . import main as cli  # pylint: disable=import-outside-toplevel
+    return cli.check_request(request, sys.stdout)
+
+def main(prog=None):
+    if prog is None:
+        prog = '{interp} -m {mod}'.format(
+            interp=os.path.basename(sys.executable),
+            mod=(__package__ + '.client'),
+        )
+    def error(message):
+        print('usage: {prog} {usage}'.format(prog=prog, usage=usage), file=sys.stderr)
+        print('{prog}: error: {msg}'.format(prog=prog, msg=message), file=sys.stderr)
+        sys.exit(1)
+    # getopt or argparse would be more convenient,
+    # but importing them would double the startup time.
+    stdin_name = '-'
+    verbose = False
+    args = sys.argv[1:]
+    while args and args[0].startswith('-') and args[0] != '-':
+        arg = args.pop(0)
+        if arg == '--':
+            break
+        if arg in ('-v', '--verbose'):
+            verbose = True
+        elif arg == '--stdin-name':
+            if not args:
+                error('argument --stdin-name: expected one argument')
+            stdin_name = args.pop(0)
+        elif arg.startswith('--stdin-name='):
+            stdin_name = arg.partition('=')[2]
+        else:
+            error('unrecognized argument: {arg}'.format(arg=arg))
+    if len(args) < 2:
+        error('the following arguments are required: SOCKET, FILE-OR-DIR')
+    socket_path = args.pop(0)
+    request = daemon.Request(os.getcwd(), verbose=verbose)
+    for path in args:
+        if path == '-':
+            request.items += [(stdin_name, read_stdin())]
+        else:
+            request.items += [(path, None)]
+    sys.stdout.flush()
+    stdout = sys.stdout if str is bytes else sys.stdout.buffer
+    try:
+        status, message = daemon.send_request(socket_path, request, stdout)
+    except socket.error as exc:
+        print('{prog}: warning: cannot connect to daemon: {exc}'.format(prog=prog, exc=exc), file=sys.stderr)
+        status = 0 if check_locally(request) else 2
+        message = None
+    except daemon.ProtocolError as exc:
+        status = 1
+        message = str(exc)
+    if message is not None:
+        print('{prog}: error: {msg}'.format(prog=prog, msg=message), file=sys.stderr)
+    sys.exit(status)
+
+if __name__ == '__main__':
+    main()
+
+__all__ = ['main']
+
+# vim:ts=4 sts=4 sw=4 et
@@ -0,0 +1,280 @@
+# encoding=UTF-8
+
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+'''
+pydiatra check daemon and its client
+'''
+
+# The protocol is as follows.
+# The client connects to the daemon's Unix socket,
+# sends the request, and shuts down the writing side of the connection.
+# The request is a sequence of key-value pairs,
+# each encoded as two netstrings (b"<length>:<bytes>,"):
+#
+# * cwd: working directory (required, must come first);
+# * verbose: b"1" to print "OK" for files without issues;
+# * path: file or directory to check;
+# * data: source code of the file named by the preceding path;
+#   the file is then not read from disk.
+#
+# The daemon replies with the check results,
+# followed by b"\0<status>\n" or b"\0<status> <error message>\n".
+# The status is 0 if no issues were found, 2 if some were found,
+# and 1 on error.
+#
+# This module imports only what the client needs,
+# so that starting the client is cheap.
+
+import errno
+import io
+import os
+import socket
+import sys
+
+from . import utils
+
+class ProtocolError(ValueError):
+    pass
+
+def dump_netstring(s):
+    return str(len(s)).encode('ASCII') + b':' + s + b','
+
+def load_netstrings(data):
+    i = 0
+    while i < len(data):
+        j = data.find(b':', i, i + 21)
+        if j < 0:
+            raise ProtocolError('malformed netstring')
+        try:
+            n = int(data[i:j])
+        except ValueError:
+            raise ProtocolError('malformed netstring')
+        i = j + 1
+        j = i + n
+        if data[j:j + 1] != b',':
+            raise ProtocolError('malformed netstring')
+        yield data[i:j]
+        i = j + 1
+
+class Request(object):
+
+    def __init__(self, cwd, verbose=False, items=()):
+        self.cwd = cwd
+        self.verbose = verbose
+        # (path, data) pairs; data is None for files to be read from disk
+        self.items = list(items)
+
+    def dumps(self):
+        fields = [b'cwd', utils.fsencode(self.cwd)]
+        if self.verbose:
+            fields += [b'verbose', b'1']
+        for path, data in self.items:
+            fields += [b'path', utils.fsencode(path)]
+            if data is not None:
+                fields += [b'data', data]
+        return b''.join(dump_netstring(field) for field in fields)
+
+    @classmethod
+    def loads(cls, data):
+        fields = iter(load_netstrings(data))
+        request = None
+        for key in fields:
+            value = next(fields, None)
+            if value is None:
+                raise ProtocolError('missing value for {key!r}'.format(key=key))
+            if request is None:
+                if key != b'cwd':
+                    raise ProtocolError('missing cwd')
+                request = cls(utils.fsdecode(value))
+            elif key == b'verbose':
+                request.verbose = value == b'1'
+            elif key == b'path':
+                request.items += [(utils.fsdecode(value), None)]
+            elif key == b'data':
+                if not request.items or request.items[-1][1] is not None:
+                    raise ProtocolError('data without path')
+                request.items[-1] = (request.items[-1][0], value)
+            else:
+                raise ProtocolError('unknown key {key!r}'.format(key=key))
+        if request is None:
+            raise ProtocolError('empty request')
+        return request
+
+def recv_all(sock):
+    chunks = []
+    while True:
+        chunk = sock.recv(1 << 16)
+        if not chunk:
+            break
+        chunks += [chunk]
+    return b''.join(chunks)
+
+class SocketWriter(io.RawIOBase):
+    '''
+    minimal writable file object on top of a socket
+    '''
+
+    def __init__(self, sock):
+        super(SocketWriter, self).__init__()
+        self._sock = sock
+
+    def writable(self):
+        return True
+
+    def write(self, b):  # pylint: disable=arguments-renamed
+        self._sock.sendall(b)
+        return len(b)
+
+def open_socket_writer(sock):
+    file = io.BufferedWriter(SocketWriter(sock))
+    if str is bytes:
+        return file
+    return io.TextIOWrapper(file,
+        encoding=sys.getfilesystemencoding(),
+        errors='surrogateescape',
+    )
+
+def bind(path):
+    '''
+    create a listening socket at the path;
+    a stale socket left behind by a dead daemon is replaced
+    '''
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        try:
+            sock.bind(path)
+        except socket.error as exc:
+            if exc.errno != errno.EADDRINUSE:
+                raise
+            try:
+                connect(path).close()
+            except socket.error:
+                pass
+            else:
+                raise
+            os.unlink(path)
+            sock.bind(path)
+        sock.listen(16)
+    except BaseException:
+        sock.close()
+        raise
+    return sock
+
+def handle(conn, handler):
+    data = recv_all(conn)
+    status = 1
+    message = None
+    file = open_socket_writer(conn)
+    try:
+        request = Request.loads(data)
+        os.chdir(request.cwd)
+        status = 0 if handler(request, file) else 2
+    except (ProtocolError, EnvironmentError) as exc:
+        message = str(exc)
+    except Exception:  # pylint: disable=broad-except
+        # The client doesn't need this module, so import it only here.
+        import traceback  # pylint: disable=import-outside-toplevel
+        message = traceback.format_exc().rstrip('\n')
+    file.flush()
+    trailer = '\0{0}'.format(status)
+    if message is not None:
+        trailer += ' ' + message
+    trailer += '\n'
+    conn.sendall(utils.fsencode(trailer))
+
+# how long (in seconds) the daemon waits for a client
+# to send the request or to receive the results, before dropping it
+client_timeout = 10
+
+def serve(sock, handler):
+    '''
+    accept and handle requests one by one, until interrupted;
+    handler(request, file) should print the results to the file,
+    and return True if no issues were found
+    '''
+    while True:
+        conn, _ = sock.accept()
+        # The requests are handled one by one,
+        # so a stuck client would block all the others.
+        conn.settimeout(client_timeout)
+        try:
+            handle(conn, handler)
+        except socket.error:
+            # the client went away, or timed out
+            pass
+        finally:
+            conn.close()
+
+def connect(path):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except BaseException:
+        sock.close()
+        raise
+    return sock
+
+def send_request(path, request, file):
+    '''
+    send the request to the daemon listening at the path;
+    copy the results to the binary file;
+    return (status, error message or None)
+    '''
+    sock = connect(path)
+    try:
+        sock.sendall(request.dumps())
+        sock.shutdown(socket.SHUT_WR)
+        trailer = None
+        while True:
+            chunk = sock.recv(1 << 16)
+            if not chunk:
+                break
+            if trailer is None:
+                i = chunk.find(b'\0')
+                if i < 0:
+                    file.write(chunk)
+                    continue
+                file.write(chunk[:i])
+                trailer = chunk[i + 1:]
+            else:
+                trailer += chunk
+    finally:
+        sock.close()
+    if trailer is None or not trailer.endswith(b'\n'):
+        raise ProtocolError('connection closed prematurely')
+    trailer = utils.fsdecode(trailer[:-1])
+    status, _, message = trailer.partition(' ')
+    try:
+        status = int(status)
+    except ValueError:
+        raise ProtocolError('malformed status')
+    return status, (message or None)
+
+__all__ = [
+    'ProtocolError',
+    'Request',
+    'bind',
+    'send_request',
+    'serve',
+]
+
+# vim:ts=4 sts=4 sw=4 et
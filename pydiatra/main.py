@@ -24,16 +24,19 @@
 pydiatra CLI
 '''
 
+# pylint: disable=too-many-lines
+
 from __future__ import print_function
 
 import argparse
-import io
+import collections
+import functools
 import itertools
-import multiprocessing
 import os
 import re
 import signal
 import sys
+import time
 
 try:
     import concurrent.futures
@@ -43,8 +46,20 @@ except ImportError as exc:
 else:
     concurrent_exc = None
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Modules needed only for some options (cache, daemon, pool)
+# are imported only when they're used, to keep start-up cheap.
 from . import __version__
 from . import checks
+from . import metrics
+from . import profiling
+from . import tags as taginfo
+from . import tracing
+from . import utils
 
 matches_python_shebang = re.compile(br'#!.*[/\s]python[0-9.]*\s').match
 
@@ -53,41 +68,578 @@ def has_python_shebang(path):
         line = file.readline(128)
     return matches_python_shebang(line)
 
-def walk_paths(paths):
+class DirEntry(object):
+    '''
+    minimal os.DirEntry replacement for Python < 3.5
+    '''
+
+    def __init__(self, dirpath, name):
+        self.name = name
+        self.path = os.path.join(dirpath, name)
+
+    def is_dir(self):
+        return os.path.isdir(self.path)
+
+    def is_file(self):
+        return os.path.isfile(self.path)
+
+    def is_symlink(self):
+        return os.path.islink(self.path)
+
+    def stat(self):
+        return os.stat(self.path)
+
+def scandir(path):
+    try:
+        os_scandir = os.scandir  # pylint: disable=no-member
+    except AttributeError:  # Python < 3.5
+        return [DirEntry(path, name) for name in os.listdir(path)]
+    return list(os_scandir(path))
+
+def is_executable(entry):
+    if not entry.is_file():
+        # Opening sockets or FIFOs would fail or hang.
+        return False
+    mode = entry.stat().st_mode
+    if not (mode & 0o111):  # pylint: disable=superfluous-parens
+        # fast path: no need for the access(2) syscall
+        return False
+    return os.access(entry.path, os.X_OK)
+
+def scan_dir(path, stat=False):
+    '''
+    list the directory;
+    return (files, subdirs) pair,
+    where files is a list of (path, size) pairs for Python source files,
+    and subdirs is a list of paths of subdirectories to descend into
+    (size is None, unless stat is true)
+    '''
+    files = []
+    subdirs = []
+    try:
+        entries = scandir(path)
+    except EnvironmentError:
+        # os.walk() ignores such errors, too
+        return files, subdirs
+    for entry in entries:
+        name = entry.name
+        try:
+            is_dir = entry.is_dir()
+        except EnvironmentError:
+            is_dir = False
+        if is_dir:
+            if name == '__pycache__':
+                continue
+            if entry.is_symlink():
+                continue
+            subdirs += [entry.path]
+            continue
+        if name.endswith(('.pyc', '.pyo')):
+            continue
+        if name.endswith('.py'):
+            pass
+        elif is_executable(entry) and has_python_shebang(entry.path):
+            pass
+        else:
+            continue
+        size = None
+        if stat:
+            try:
+                size = entry.stat().st_size
+            except EnvironmentError:
+                pass
+        files += [(entry.path, size)]
+    return files, subdirs
+
+def walk_dir(path, executor=None, readahead=0, stat=False):
+    '''
+    walk the directory tree, top-down;
+    generate (path, size) pairs for Python source files
+
+    If executor is not None, use it to scan up to readahead directories
+    ahead of time. The order of paths is the same as without executor.
+    '''
+    if executor is None:
+        readahead = 0
+    # stack of [path, future] lists, to be popped from the end
+    stack = [[path, None]]
+    while stack:
+        for item in stack[-readahead:] if readahead > 0 else ():
+            if item[1] is None:
+                item[1] = executor.submit(scan_dir, item[0], stat=stat)
+        [path, future] = stack.pop()
+        if future is None:
+            files, subdirs = scan_dir(path, stat=stat)
+        else:
+            files, subdirs = future.result()
+        for item in files:
+            yield item
+        stack += [[subdir, None] for subdir in reversed(subdirs)]
+
+def walk_files(paths, executor=None, readahead=0, stat=False):
+    '''
+    generate (path, size) pairs for Python source files
+    (size is None, unless stat is true and the file was found in a directory)
+    '''
     for path in paths:
         if os.path.isdir(path):
-            for dirpath, dirnames, filenames in os.walk(path):
-                dirnames[:] = [d for d in dirnames if d != '__pycache__']
-                for filename in filenames:
-                    if filename.endswith(('.pyc', '.pyo')):
-                        continue
-                    path = os.path.join(dirpath, filename)
-                    if filename.endswith('.py'):
-                        pass
-                    elif os.access(path, os.X_OK) and has_python_shebang(path):
-                        pass
-                    else:
-                        continue
-                    yield path
+            for item in walk_dir(path, executor=executor, readahead=readahead, stat=stat):
+                yield item
         else:
-            yield path
+            yield path, None
 
-def check_file(path, verbose=False, file=sys.stdout):
-    n = 0
-    for t in checks.check_file(path):
-        print(t, file=file)
-        n += 1
+def read_paths(file, delimiter=b'\n'):
+    '''
+    generate paths read from the binary file, as soon as they're available
+    '''
+    fd = file.fileno()
+    tail = b''
+    while True:
+        # Unlike file.read(), this doesn't wait until the buffer is full.
+        chunk = os.read(fd, 1 << 16)
+        if not chunk:
+            break
+        paths = (tail + chunk).split(delimiter)
+        tail = paths.pop()
+        for path in paths:
+            if path:
+                yield utils.fsdecode(path)
+    if tail:
+        yield utils.fsdecode(tail)
+
+def walk_paths(paths, executor=None, readahead=0):
+    for path, _ in walk_files(paths, executor=executor, readahead=readahead):
+        yield path
+
+def check_file(path, result_cache=None, data=None):
+    '''
+    check the file;
+    return tuple of tags in the compact form (see Tag.as_tuple())
+    '''
+    with profiling.timer('check_file', path=path):
+        if result_cache is None:
+            tags = tuple(t.as_tuple() for t in checks.check_file(path, data=data))
+        else:
+            tags = result_cache.check_file(path, data=data)
+    profiling.end_file()
+    return tags
+
+def format_tags(path, tags, verbose=False, output_format='text'):
+    '''
+    render the tags in the compact form;
+    return (number of tags, output) pair
+    '''
+    tags = [checks.tag(path, *item) for item in tags]
+    n = len(tags)
     if verbose and (n == 0):
-        print(checks.tag(path, None, 'OK'))
-    return n
+        tags = [checks.tag(path, None, 'OK')]
+    if output_format == 'json':
+        lines = [t.as_json() for t in tags]
+    else:
+        lines = [str(t) for t in tags]
+    return n, str.join('', (line + '\n' for line in lines))
 
-def check_file_s(path, verbose=False):
-    if str is bytes:
-        file = io.BytesIO()
+def enable_profiling():
+    if profiling.enable():
+        checks.instrument_checks()
+        profiling.instrument_function(checks.check_re, 'check', trace=True)
+
+def enable_tracing(process_name):
+    # Tracing is built on top of the profiling hooks.
+    tracing.enable(process_name)
+    enable_profiling()
+
+def check_batch(paths, result_cache=None, profile=False, trace=False):
+    '''
+    check the files (in a worker process);
+    return (results, start time, profiling stats, trace events, regexp memo updates) tuple,
+    where results is a list of (tags, time spent checking) pairs
+    (tags is an EnvironmentError instead, if the file couldn't be read)
+
+    If this worker process reaches its limits (--max-files-per-worker etc.),
+    the rest of the files are left unchecked, and results are shorter than paths.
+    '''
+    start = time.time()
+    # This is normally a no-op, as init_worker() has already loaded the data;
+    # but the executor may not support initializers.
+    checks.load_data()
+    if trace:
+        enable_tracing('pydiatra worker')
+    elif profile:
+        enable_profiling()
+    from . import pool  # pylint: disable=import-outside-toplevel
+    # Send back the tags in the compact form, rather than pre-rendered output:
+    # it's cheaper to pickle, and lets the main process choose the format.
+    results = []
+    with tracing.span('batch', files=len(paths)):
+        for i, path in enumerate(paths):
+            # Let the pool know which file is being checked,
+            # and restart the time limit.
+            pool.report_progress(i)
+            file_start = profiling.clock()
+            try:
+                tags = check_file(path, result_cache=result_cache)
+            except MemoryError:
+                tags = (checks.resource_limit_tag(path, 'memory').as_tuple(),)
+            except EnvironmentError as exc:
+                # Not a bug in pydiatra (the file might not exist, for example).
+                # Let the main process raise the exception,
+                # as it does when checking files by itself.
+                tags = exc
+            except Exception as exc:  # pylint: disable=broad-except
+                # Don't throw away the results for the whole batch
+                # (or the whole run) because of a single file.
+                message = '{tp}: {exc}'.format(tp=type(exc).__name__, exc=exc)
+                tags = (checks.internal_error_tag(path, message).as_tuple(),)
+            results += [(tags, profiling.clock() - file_start)]
+            if update_worker_usage(path):
+                break
+    memo_updates = checks.check_re.pop_memo_updates()
+    if result_cache is None:
+        # Nobody will save them.
+        memo_updates = None
+    return results, start, profiling.pop_stats(), tracing.pop_events(), memo_updates
+
+# how much this worker process has checked, and how much it may check
+# before it's replaced (to keep memory usage in check)
+worker_usage = dict(files=0, bytes=0, max_files=None, max_bytes=None)
+
+def init_worker(max_files=None, max_bytes=None, regexp_memo=None, selection=None):
+    if os.name != 'nt':
+        # Let the main process handle ^C.
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+    worker_usage.update(max_files=max_files, max_bytes=max_bytes)
+    checks.select(selection)
+    checks.load_data()
+    if regexp_memo:
+        checks.check_re.update_memo(regexp_memo)
+
+def update_worker_usage(path):
+    '''
+    account for the checked file;
+    ask the pool to replace this worker process if it has checked enough,
+    and return True if so
+    '''
+    from . import pool  # pylint: disable=import-outside-toplevel
+    max_files = worker_usage['max_files']
+    max_bytes = worker_usage['max_bytes']
+    worker_usage['files'] += 1
+    if max_bytes is not None:
+        worker_usage['bytes'] += get_file_size(path)
+    if max_files is not None and worker_usage['files'] >= max_files:
+        pool.retire()
+        return True
+    if max_bytes is not None and worker_usage['bytes'] >= max_bytes:
+        pool.retire()
+        return True
+    return False
+
+batch_max_files = 64
+batch_max_bytes = 256 << 10
+
+def get_file_size(path):
+    try:
+        return os.stat(path).st_size
+    except EnvironmentError:
+        return 0
+
+def iter_work_items(files, schedule='walk'):
+    '''
+    generate (index, path, size) tuples in the order they should be checked
+    '''
+    items = (
+        (i, path, get_file_size(path) if size is None else size)
+        for i, (path, size) in enumerate(files)
+    )
+    if schedule == 'size':
+        # Check the largest files first, so that a single big file
+        # doesn't keep one worker busy long after others are idle.
+        # This is the LPT (Longest Processing Time first) rule.
+        items = sorted(items, key=lambda item: (-item[2], item[0]))
+    elif schedule != 'walk':
+        raise ValueError('unknown schedule: {0!r}'.format(schedule))
+    return items
+
+def iter_batches(items, jobs):
+    '''
+    group work items into batches, to amortize the IPC overhead
+    '''
+    # Start with single-file batches, so that all the workers get busy
+    # quickly even if there are only a few files; then keep doubling
+    # the batch size after every round.
+    max_files = 1
+    n = 0
+    batch = []
+    size = 0
+    for item in items:
+        batch += [item]
+        size += item[2]
+        if len(batch) >= max_files or size >= batch_max_bytes:
+            yield batch
+            batch = []
+            size = 0
+            n += 1
+            if n % jobs == 0:
+                max_files = min(max_files * 2, batch_max_files)
+    if batch:
+        yield batch
+
+# In Python 2.X, waiting for a lock can't be interrupted by ^C,
+# unless there's a timeout.
+wait_timeout = None if sys.version_info >= (3,) else 1
+
+def unpack_result(path, tags):
+    '''
+    return the (path, tags) pair,
+    or raise the exception that check_batch() returned instead of the tags
+    '''
+    if isinstance(tags, EnvironmentError):
+        raise tags
+    return path, tags
+
+def check_batches(executor, batches, jobs, order='bounded', **kwargs):
+    '''
+    check batches of files using the executor;
+    generate (path, tags) pairs, with tags in the compact form
+
+    order can be:
+    None (results are generated as soon as they're available);
+    "bounded" (results are generated in walk order,
+    and no more batches are submitted while too many results are held back;
+    this requires the batches to be in walk order);
+    "unbounded" (results are generated in walk order).
+    '''
+    if order not in (None, 'bounded', 'unbounded'):
+        raise ValueError('unknown order: {0!r}'.format(order))
+    from . import pool  # pylint: disable=import-outside-toplevel
+    window = jobs * 4
+    batches = iter(batches)
+    running = {}
+    # results that arrived out of walk order:
+    pending = {}
+    next_i = 0
+    # the last walk index of every batch whose results haven't been generated yet:
+    held = collections.deque()
+    # the walk indices of files that have been retried
+    retried = set()
+    exhausted = False
+    def submit(batch):
+        paths = [path for _, path, _ in batch]
+        future = executor.submit(check_batch, paths,
+            profile=profiling.enabled(),
+            trace=tracing.enabled(),
+            **kwargs
+        )
+        future.submit_time = time.time()
+        running[future] = batch
+    try:
+        while True:
+            while not exhausted and len(running) < window:
+                if order == 'bounded' and len(held) >= window:
+                    break
+                batch = next(batches, None)
+                if batch is None:
+                    exhausted = True
+                    break
+                submit(batch)
+                if order == 'bounded':
+                    held.append(batch[-1][0])
+            if not running:
+                break
+            FIRST_COMPLETED = concurrent.futures.FIRST_COMPLETED  # pylint: disable=no-member
+            with tracing.span('wait'):
+                done = None
+                while not done:
+                    done, _ = concurrent.futures.wait(running, timeout=wait_timeout, return_when=FIRST_COMPLETED)  # pylint: disable=no-member
+            for future in done:
+                batch = running.pop(future)
+                try:
+                    results, start, stats, events, memo_updates = future.result()
+                except (pool.Timeout, pool.WorkerDied) as exc:
+                    # The worker process died, or was killed,
+                    # while checking one of the files.
+                    # (The pool has already replaced it.)
+                    # Check the rest of the batch again.
+                    k = exc.progress or 0
+                    rest = batch[:k] + batch[k + 1:]
+                    if rest:
+                        submit(rest)
+                    i, path, _ = batch[k]
+                    batch = [batch[k]]
+                    if isinstance(exc, pool.Timeout):
+                        tag = checks.resource_limit_tag(path, 'time')
+                        seconds = exc.seconds
+                    elif i not in retried:
+                        # Perhaps it wasn't this file's fault;
+                        # try again, without other files in the batch.
+                        retried.add(i)
+                        submit(batch)
+                        continue
+                    else:
+                        tag = checks.internal_error_tag(path, str(exc))
+                        seconds = time.time() - future.submit_time
+                    results = [((tag.as_tuple(),), seconds)]
+                else:
+                    if len(results) < len(batch):
+                        # The worker process has reached its limits.
+                        # Check the rest of the batch in another one.
+                        submit(batch[len(results):])
+                        batch = batch[:len(results)]
+                    profiling.merge_stats(stats)
+                    tracing.merge_events(events)
+                    if memo_updates:
+                        checks.check_re.update_memo(memo_updates)
+                    metrics.add_batch(start - future.submit_time)
+                for (i, path, size), (tags, seconds) in zip(batch, results):
+                    if not isinstance(tags, EnvironmentError):
+                        metrics.add_file(path, size, seconds, tags)
+                    if order is None:
+                        yield unpack_result(path, tags)
+                    else:
+                        pending[i] = path, tags
+            while next_i in pending:
+                yield unpack_result(*pending.pop(next_i))
+                next_i += 1
+            while held and held[0] < next_i:
+                held.popleft()
+    finally:
+        # If the caller has given up (e.g. because of ^C),
+        # don't let the executor check the rest of the files.
+        for future in running:
+            future.cancel()
+
+def check_files(files, jobs=1, executor=None, schedule='walk', unordered=False, **kwargs):
+    '''
+    check the files, either sequentially or using the executor;
+    generate (path, tags) pairs, with tags in the compact form
+
+    files is an iterable of (path, size) pairs.
+    '''
+    if executor is None:
+        for path, size in files:
+            start = profiling.clock()
+            tags = check_file(path, **kwargs)
+            metrics.add_file(path, size, profiling.clock() - start, tags)
+            yield path, tags
+        return
+    if unordered:
+        order = None
+    elif schedule == 'walk':
+        order = 'bounded'
     else:
-        file = io.StringIO()
-    n = check_file(path, verbose=verbose, file=file)
-    return n, file.getvalue()
+        order = 'unbounded'
+    items = iter_work_items(files, schedule=schedule)
+    batches = iter_batches(items, jobs=jobs)
+    for result in check_batches(executor, batches, jobs=jobs, order=order, **kwargs):
+        yield result
+
+def check_paths(paths, jobs=1, walk_executor=None, **kwargs):
+    '''
+    check the files and directories;
+    generate (path, tags) pairs, with tags in the compact form
+    '''
+    files = walk_files(paths,
+        executor=walk_executor,
+        readahead=(jobs * 4),
+        stat=(walk_executor is not None),
+    )
+    files = metrics.time_walk(files)
+    files = tracing.trace_iter('walk', files)
+    return check_files(files, jobs=jobs, **kwargs)
+
+def check_request(request, file, result_cache=None, **kwargs):
+    '''
+    check the files and directories from the daemon request,
+    print the results to the file;
+    return True if no issues were found
+    '''
+    checks.load_data()
+    ok = True
+    for path, data in request.items:
+        if data is None:
+            results = check_paths([path], result_cache=result_cache, **kwargs)
+        else:
+            results = [(path, check_file(path, result_cache=result_cache, data=data))]
+        for path, tags in results:
+            n, s = format_tags(path, tags, verbose=request.verbose)
+            file.write(s)
+            if n > 0:
+                ok = False
+    return ok
+
+def serve(sock, socket_path, **kwargs):
+    '''
+    check files on behalf of clients connecting to the listening socket,
+    until interrupted;
+    then remove the socket, which must be at the absolute socket_path
+    (the working directory changes with every request)
+    '''
+    from . import daemon  # pylint: disable=import-outside-toplevel
+    def handler(request, file):
+        return check_request(request, file, **kwargs)
+    try:
+        daemon.serve(sock, handler)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sock.close()
+        os.unlink(socket_path)
+
+watch_interval = 1
+
+def get_stamp(path):
+    st = os.stat(path)
+    mtime = getattr(st, 'st_mtime_ns', st.st_mtime)
+    return mtime, st.st_size
+
+def print_diff(old_lines, new_lines):
+    for line in old_lines:
+        if line not in new_lines:
+            sys.stdout.write('-' + line)
+    for line in new_lines:
+        if line not in old_lines:
+            sys.stdout.write('+' + line)
+
+def watch(paths, jobs=1, walk_executor=None, verbose=False, output_format='text', **kwargs):
+    '''
+    check the files and directories repeatedly, until interrupted;
+    print the initial results,
+    and then the differences between them and the current results;
+    return True if there are no issues in the current results
+    '''
+    # path -> (stamp, number of issues, output lines)
+    results = {}
+    first = True
+    try:
+        while True:
+            stamps = collections.OrderedDict()
+            for path, _ in walk_files(paths, executor=walk_executor, readahead=jobs * 4):
+                try:
+                    stamps[path] = get_stamp(path)
+                except EnvironmentError:
+                    continue
+            for path in sorted(set(results) - set(stamps)):
+                print_diff(results.pop(path)[2], [])
+            changed = [
+                path for path, stamp in stamps.items()
+                if path not in results or results[path][0] != stamp
+            ]
+            files = [(path, stamps[path][1]) for path in changed]
+            new_results = check_files(files, jobs=jobs, **kwargs)
+            for path, tags in new_results:
+                n, s = format_tags(path, tags, verbose=verbose, output_format=output_format)
+                lines = s.splitlines(True)
+                if first:
+                    sys.stdout.write(s)
+                else:
+                    print_diff(results.get(path, (None, 0, []))[2], lines)
+                results[path] = (stamps[path], n, lines)
+            sys.stdout.flush()
+            first = False
+            time.sleep(watch_interval)
+    except KeyboardInterrupt:
+        pass
+    return not any(n for _, n, _ in results.values())
 
 def get_cpu_count():
     try:
@@ -96,6 +648,7 @@ def get_cpu_count():
         pass
     else:
         return len(sched_getaffinity(0))
+    import multiprocessing  # pylint: disable=import-outside-toplevel
     try:
         return multiprocessing.cpu_count()
     except NotImplementedError:
@@ -113,6 +666,43 @@ def parse_jobs(s):
     return n
 parse_jobs.__name__ = 'jobs'
 
+default_cache_size = 100000
+
+def parse_cache_size(s):
+    n = int(s)
+    if n <= 0:
+        raise ValueError
+    return n
+parse_cache_size.__name__ = 'cache size'
+
+def parse_timeout(s):
+    n = float(s)
+    if n <= 0:
+        raise ValueError
+    return n
+parse_timeout.__name__ = 'timeout'
+
+def parse_max_files(s):
+    n = int(s)
+    if n <= 0:
+        raise ValueError
+    return n
+parse_max_files.__name__ = 'number of files'
+
+size_units = dict(K=1 << 10, M=1 << 20, G=1 << 30)
+
+def parse_size(s):
+    # mebibytes by default
+    unit = 1 << 20
+    if s[-1:].upper() in size_units:
+        unit = size_units[s[-1:].upper()]
+        s = s[:-1]
+    n = int(s)
+    if n <= 0:
+        raise ValueError
+    return n * unit
+parse_size.__name__ = 'size'
+
 def maybe_reexec(argv0=None):
     if os.name == 'nt':
         # os.execv() is hopelessly broken on Windows.
@@ -204,41 +794,304 @@ def main(runpy=False, script=None):
         signal.signal(signal.SIGPIPE, signal.SIG_DFL)
     ap = ArgumentParser(prog=prog)
     ap.color = False  # pylint: disable=attribute-defined-outside-init
-    ap.add_argument('paths', metavar='FILE-OR-DIR', nargs='+')
+    ap.add_argument('paths', metavar='FILE-OR-DIR', nargs='*')
     ap.add_argument('--version', action=VersionAction)
+    ap.add_argument('--files-from', metavar='FILE',
+        help='read the files and directories to check from FILE ("-" for stdin), one per line'
+    )
+    ap.add_argument('-0', '--null', action='store_true',
+        help='with --files-from, expect NUL-terminated names instead of lines'
+    )
     ap.add_argument('-v', '--verbose', action='store_true', help='print "OK" if no issues were found')
     ap.add_argument('-j', '--jobs', metavar='N', type=parse_jobs, default=1,
         help=('use N processes' if concurrent else argparse.SUPPRESS)
     )
+    ap.add_argument('--threads', action='store_true',
+        help=('with -j, use threads rather than processes' if concurrent else argparse.SUPPRESS)
+    )
+    ap.add_argument('--format', choices=('text', 'json'), default='text',
+        help='output format: "text" or JSON Lines (default: %(default)s)'
+    )
+    ap.add_argument('--enable', metavar='TAGS', action='append', default=[],
+        help='report only these tags (comma-separated names or glob patterns)'
+    )
+    ap.add_argument('--disable', metavar='TAGS', action='append', default=[],
+        help='don\'t report these tags (comma-separated names or glob patterns)'
+    )
+    ap.add_argument('--min-severity', choices=taginfo.severities,
+        help='report only tags of at least this severity'
+    )
+    ap.add_argument('--min-certainty', choices=taginfo.certainties,
+        help='report only tags of at least this certainty'
+    )
+    ap.add_argument('--schedule', choices=('walk', 'size'), default='walk',
+        help=(
+            'order in which files are dispatched to processes: '
+            'as they are found, or largest first (default: %(default)s)'
+            if concurrent else argparse.SUPPRESS
+        )
+    )
+    ap.add_argument('--unordered', action='store_true',
+        help=(
+            'print results as soon as they are available, '
+            'rather than in the order the files were found'
+            if concurrent else argparse.SUPPRESS
+        )
+    )
+    ap.add_argument('--watch', action='store_true',
+        help='keep checking the files whenever they change, until interrupted'
+    )
+    # (Checking for socket.AF_UNIX here would mean importing socket on every run;
+    # it's checked properly only if --daemon is used.)
+    ap.add_argument('--daemon', metavar='SOCKET',
+        help=(
+            'keep running, and check files on behalf of clients '
+            'connecting to the Unix socket SOCKET'
+            if os.name == 'posix' else argparse.SUPPRESS
+        )
+    )
+    ap.add_argument('--timeout', metavar='SECONDS', type=parse_timeout,
+        help=(
+            'give up checking a file after SECONDS seconds'
+            if concurrent else argparse.SUPPRESS
+        )
+    )
+    ap.add_argument('--memory-limit', metavar='SIZE', type=parse_size,
+        help=(
+            'limit the virtual memory of every process checking files to SIZE '
+            '(in MiB, or with a K, M, or G suffix)'
+            if concurrent and resource is not None else argparse.SUPPRESS
+        )
+    )
+    ap.add_argument('--max-files-per-worker', metavar='N', type=parse_max_files,
+        help=(
+            'replace every worker process after it has checked N files'
+            if concurrent else argparse.SUPPRESS
+        )
+    )
+    ap.add_argument('--max-bytes-per-worker', metavar='SIZE', type=parse_size,
+        help=(
+            'replace every worker process after it has checked files of total size SIZE '
+            '(in MiB, or with a K, M, or G suffix)'
+            if concurrent else argparse.SUPPRESS
+        )
+    )
+    ap.add_argument('--profile', action='store_true',
+        help='measure how much time is spent in each check, and print the report to stderr'
+    )
+    ap.add_argument('--metrics-file', metavar='FILE',
+        help='write run metrics to FILE, in the OpenMetrics text format'
+    )
+    ap.add_argument('--trace-file', metavar='FILE',
+        help='write a timeline of the run to FILE, in the Chrome trace event format'
+    )
+    ap.add_argument('--cache-dir', metavar='DIR',
+        help='cache check results in DIR'
+    )
+    ap.add_argument('--cache-size', metavar='N', type=parse_cache_size, default=default_cache_size,
+        help='keep at most N entries in the cache (default: %(default)s)'
+    )
     options = ap.parse_args()
-    if options.jobs > 1:
+    daemon_socket = None
+    if options.null and options.files_from is None:
+        ap.error('--null requires --files-from')
+    if options.daemon is None:
+        if not options.paths and options.files_from is None:
+            ap.error('the following arguments are required: FILE-OR-DIR')
+    else:
+        if options.paths or options.files_from is not None:
+            ap.error('--daemon does not take FILE-OR-DIR arguments')
+        if options.watch:
+            ap.error('--daemon cannot be combined with --watch')
+        if options.jobs > 1 and not options.threads:
+            # The worker processes wouldn't follow the clients' working directories.
+            ap.error('--daemon cannot be combined with -j (unless with --threads)')
+        if options.timeout is not None or options.memory_limit is not None:
+            # ditto
+            ap.error('--daemon cannot be combined with --timeout or --memory-limit')
+        import socket  # pylint: disable=import-outside-toplevel
+        from . import daemon  # pylint: disable=import-outside-toplevel
+        if not hasattr(socket, 'AF_UNIX'):
+            ap.error('--daemon requires Unix sockets')
+        # The daemon changes the working directory to that of each client,
+        # so paths given on the command line must be made absolute now.
+        for name in ('cache_dir', 'metrics_file', 'trace_file'):
+            path = getattr(options, name)
+            if path is not None:
+                setattr(options, name, os.path.abspath(path))
+        try:
+            # (The relative path is used for binding,
+            # because the absolute one might be too long for a socket address.)
+            daemon_socket = daemon.bind(options.daemon)
+        except EnvironmentError as exc:
+            message = '{prog}: error: cannot listen on {path}: {exc}'
+            message = message.format(prog=ap.prog, path=options.daemon, exc=exc)
+            print(message, file=sys.stderr)
+            sys.exit(1)
+    if options.memory_limit is not None and resource is None:
+        ap.error('--memory-limit is not supported on this platform')
+    if options.threads:
+        for name in ('timeout', 'memory_limit', 'max_files_per_worker', 'max_bytes_per_worker'):
+            if getattr(options, name) is not None:
+                # Threads can't be killed or replaced.
+                ap.error('--threads cannot be combined with --{opt}'.format(opt=name.replace('_', '-')))
+        if options.profile or options.trace_file is not None:
+            # The profiler keeps track of only one thread.
+            ap.error('--threads cannot be combined with --profile or --trace-file')
+    if options.enable or options.disable or options.min_severity or options.min_certainty:
+        def split_patterns(args):
+            return [pattern for arg in args for pattern in arg.split(',') if pattern]
+        try:
+            selection = taginfo.Selection(
+                enable=split_patterns(options.enable),
+                disable=split_patterns(options.disable),
+                min_severity=options.min_severity,
+                min_certainty=options.min_certainty,
+            )
+        except ValueError as exc:
+            ap.error(str(exc))
+        # (This must happen before the cache is used.)
+        checks.select(selection)
+    paths = options.paths
+    files_from = None
+    if options.files_from == '-':
+        files_from = sys.stdin
+    elif options.files_from is not None:
+        try:
+            files_from = open(options.files_from, 'rb')  # pylint: disable=consider-using-with
+        except EnvironmentError as exc:
+            message = '{prog}: error: {exc}'.format(prog=ap.prog, exc=exc)
+            print(message, file=sys.stderr)
+            sys.exit(1)
+    if files_from is not None:
+        delimiter = b'\0' if options.null else b'\n'
+        paths = itertools.chain(paths, read_paths(files_from, delimiter=delimiter))
+        if options.watch:
+            paths = list(paths)
+    # With time or memory limits, files are checked in worker processes,
+    # so that exceeding the limits doesn't take down the main process.
+    use_pool = options.jobs > 1 or options.timeout is not None or options.memory_limit is not None
+    use_threads = False
+    if options.threads:
+        use_threads = use_pool
+        use_pool = False
+    if use_pool or use_threads:
         warning = None
         if not concurrent:
             warning = 'cannot import concurrent.futures: {msg}'
-        if os.name == 'nt':
+        if use_pool and os.name == 'nt':
             if sys.version_info < (3,):
                 warning = 'Windows multiprocessing is disabled for Python 2.X'
             elif script and sys.version_info < (3, 4):
                 warning = 'Windows multiprocessing requires Python >= 3.4'
         if warning is not None:
             options.jobs = 1
+            use_pool = use_threads = False
             warning = '{prog}: warning: ' + warning
             warning = warning.format(prog=ap.prog, msg=concurrent_exc)
             print(warning, file=sys.stderr)
-    checks.load_data()
-    ok = True
-    paths_itr = walk_paths(options.paths)
-    if options.jobs <= 1:
-        for path in paths_itr:
-            if check_file(path, verbose=options.verbose) > 0:
-                ok = False
+    result_cache = None
+    regexp_memo = None
+    if options.cache_dir is not None:
+        from . import cache  # pylint: disable=import-outside-toplevel
+        result_cache = cache.Cache(options.cache_dir, size=options.cache_size)
+        regexp_memo = result_cache.load_regexp_memo()
+        checks.check_re.update_memo(regexp_memo)
+    if options.trace_file is not None:
+        enable_tracing('pydiatra')
+    elif options.profile:
+        enable_profiling()
+    if options.metrics_file is not None:
+        metrics.enable(jobs=options.jobs)
+    executor = walk_executor = None
+    ThreadExecutor = None
+    if use_pool or use_threads:
+        ThreadExecutor = concurrent.futures.ThreadPoolExecutor  # pylint: disable=no-member
+    if use_pool:
+        from . import pool  # pylint: disable=import-outside-toplevel
+        # The pool starts the worker processes right away,
+        # before the directory walker threads.
+        executor = pool.Pool(
+            max_workers=options.jobs,
+            initializer=functools.partial(init_worker,
+                max_files=options.max_files_per_worker,
+                max_bytes=options.max_bytes_per_worker,
+                regexp_memo=regexp_memo,
+                selection=checks.selection,
+            ),
+            timeout=options.timeout,
+            memory_limit=options.memory_limit,
+            preload=[__name__],
+        )
+        walk_executor = ThreadExecutor(max_workers=options.jobs)
+    elif use_threads:
+        # The threads share the data, so load it once, upfront.
+        checks.load_data()
+        utils.make_warnings_thread_safe()
+        executor = ThreadExecutor(max_workers=options.jobs)
+        walk_executor = ThreadExecutor(max_workers=options.jobs)
     else:
-        Executor = concurrent.futures.ProcessPoolExecutor  # pylint: disable=no-member
-        with Executor(max_workers=options.jobs) as executor:
-            for n, s in executor.map(check_file_s, paths_itr, itertools.repeat(options.verbose)):
-                sys.stdout.write(s)
+        checks.load_data()
+    run_options = dict(
+        jobs=options.jobs,
+        executor=executor,
+        walk_executor=walk_executor,
+        schedule=options.schedule,
+        result_cache=result_cache,
+    )
+    format_options = dict(
+        verbose=options.verbose,
+        output_format=options.format,
+    )
+    try:
+        if options.daemon is not None:
+            if os.name != 'nt':
+                # Don't die when a client goes away.
+                signal.signal(signal.SIGPIPE, signal.SIG_IGN)
+            serve(daemon_socket, os.path.abspath(options.daemon), **run_options)
+            ok = True
+        elif options.watch:
+            ok = watch(paths, **dict(run_options, **format_options))
+        else:
+            ok = True
+            for path, tags in check_paths(paths, unordered=options.unordered, **run_options):
+                with tracing.span('output'):
+                    n, s = format_tags(path, tags, **format_options)
+                    sys.stdout.write(s)
                 if n > 0:
                     ok = False
+    finally:
+        if executor is not None:
+            walk_executor.shutdown()
+            if use_pool:
+                # Either all the files have been checked,
+                # or checking was interrupted (e.g. by ^C);
+                # in the latter case, don't wait for the files being checked.
+                executor.shutdown(kill=True)
+            else:
+                executor.shutdown()
+        if files_from is not None and files_from is not sys.stdin:
+            files_from.close()
+    if options.profile:
+        sys.stdout.flush()
+        profiling.print_report(sys.stderr)
+    if options.metrics_file is not None:
+        try:
+            metrics.write(options.metrics_file)
+        except EnvironmentError as exc:
+            message = '{prog}: error: cannot write metrics: {exc}'.format(prog=ap.prog, exc=exc)
+            print(message, file=sys.stderr)
+            sys.exit(1)
+    if options.trace_file is not None:
+        try:
+            tracing.write(options.trace_file)
+        except EnvironmentError as exc:
+            message = '{prog}: error: cannot write trace: {exc}'.format(prog=ap.prog, exc=exc)
+            print(message, file=sys.stderr)
+            sys.exit(1)
+    if result_cache is not None:
+        result_cache.save_regexp_memo(checks.check_re.memo)
+        result_cache.prune()
     sys.exit(0 if ok else 2)
 
 __all__ = ['main']
@@ -0,0 +1,222 @@
+# encoding=UTF-8
+
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+'''
+pydiatra run metrics
+'''
+
+import collections
+import heapq
+import os
+import sys
+
+from . import __version__
+from . import profiling
+from . import utils
+
+clock = profiling.clock
+
+slowest_files_count = 10
+
+class Metrics(object):  # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, jobs=1):
+        self.jobs = jobs
+        self.start = clock()
+        self.files = 0
+        self.bytes = 0
+        self.check_time = 0.0
+        self.walk_time = 0.0
+        self.batches = 0
+        self.queue_wait = 0.0
+        self.tags = collections.Counter()
+        # min-heap of (time, path) pairs
+        self.slowest_files = []
+
+    def add_file(self, path, size, seconds, tags):
+        self.files += 1
+        if size is None:
+            try:
+                size = os.stat(path).st_size
+            except EnvironmentError:
+                size = 0
+        self.bytes += size
+        self.check_time += seconds
+        for t in tags:
+            self.tags[t[1]] += 1
+        item = (seconds, path)
+        if len(self.slowest_files) < slowest_files_count:
+            heapq.heappush(self.slowest_files, item)
+        else:
+            heapq.heappushpop(self.slowest_files, item)
+
+    def add_batch(self, queue_wait):
+        self.batches += 1
+        self.queue_wait += queue_wait
+
+    def time_walk(self, files):
+        '''
+        generate the items of the iterable,
+        measuring how long it takes to produce them
+        '''
+        files = iter(files)
+        while True:
+            start = clock()
+            try:
+                item = next(files)
+            except StopIteration:
+                return
+            finally:
+                self.walk_time += clock() - start
+            yield item
+
+    def iter_samples(self):
+        '''
+        generate (metric family, type, unit, help, samples) tuples,
+        where samples is a list of (suffix, labels, value) tuples
+        '''
+        run_time = clock() - self.start
+        python_version = '{0}.{1}.{2}'.format(*sys.version_info)
+        yield ('pydiatra', 'info', None, 'pydiatra version', [
+            ('_info', dict(version=__version__, python=python_version), 1),
+        ])
+        yield ('pydiatra_jobs', 'gauge', None, 'number of worker processes', [
+            ('', {}, self.jobs),
+        ])
+        yield ('pydiatra_run_seconds', 'gauge', 'seconds', 'duration of the run', [
+            ('', {}, run_time),
+        ])
+        yield ('pydiatra_files', 'counter', None, 'files checked', [
+            ('_total', {}, self.files),
+        ])
+        yield ('pydiatra_files_per_second', 'gauge', None, 'files checked per second', [
+            ('', {}, self.files / (run_time or 1)),
+        ])
+        yield ('pydiatra_checked_bytes', 'counter', 'bytes', 'size of files checked', [
+            ('_total', {}, self.bytes),
+        ])
+        yield ('pydiatra_checked_bytes_per_second', 'gauge', None, 'bytes checked per second', [
+            ('', {}, self.bytes / (run_time or 1)),
+        ])
+        yield ('pydiatra_walk_seconds', 'counter', 'seconds', 'time the main process spent walking directories', [
+            ('_total', {}, self.walk_time),
+        ])
+        yield ('pydiatra_check_seconds', 'counter', 'seconds', 'time spent checking files, summed over processes', [
+            ('_total', {}, self.check_time),
+        ])
+        yield ('pydiatra_batches', 'counter', None, 'batches of files dispatched to worker processes', [
+            ('_total', {}, self.batches),
+        ])
+        yield ('pydiatra_queue_wait_seconds', 'counter', 'seconds', 'time batches waited for a worker process', [
+            ('_total', {}, self.queue_wait),
+        ])
+        utilization = self.check_time / ((self.jobs * run_time) or 1)
+        help_text = 'fraction of time processes spent checking files'
+        yield ('pydiatra_worker_utilization_ratio', 'gauge', 'ratio', help_text, [
+            ('', {}, utilization),
+        ])
+        yield ('pydiatra_tags', 'counter', None, 'issues found', [
+            ('_total', dict(tag=name), n)
+            for name, n in sorted(self.tags.items())
+        ])
+        yield ('pydiatra_slowest_file_seconds', 'gauge', 'seconds', 'time spent checking the slowest files', [
+            ('', dict(path=path), seconds)
+            for seconds, path in sorted(self.slowest_files, reverse=True)
+        ])
+
+    def format(self):
+        '''
+        return the metrics in the OpenMetrics text format
+        '''
+        lines = []
+        for name, tp, unit, help_text, samples in self.iter_samples():
+            lines += ['# TYPE {name} {tp}'.format(name=name, tp=tp)]
+            if unit is not None:
+                lines += ['# UNIT {name} {unit}'.format(name=name, unit=unit)]
+            lines += ['# HELP {name} {help}'.format(name=name, help=escape(help_text))]
+            for suffix, labels, value in samples:
+                labels = str.join(',', (
+                    '{key}="{value}"'.format(key=key, value=escape(value, quote=True))
+                    for key, value in sorted(labels.items())
+                ))
+                if labels:
+                    labels = '{' + labels + '}'
+                lines += ['{name}{suffix}{labels} {value}'.format(
+                    name=name, suffix=suffix, labels=labels, value=format_value(value),
+                )]
+        lines += ['# EOF']
+        return str.join('', (line + '\n' for line in lines))
+
+    def write(self, path):
+        '''
+        write the metrics to the file atomically,
+        so that readers never see partial contents
+        '''
+        data = self.format()
+        if str is not bytes:
+            data = data.encode('UTF-8', 'replace')
+        # The file is meant to be read by a metrics exporter,
+        # which might run as a different user.
+        utils.write_atomically(path, data, mode=0o644)
+
+def escape(s, quote=False):
+    s = s.replace('\\', r'\\').replace('\n', r'\n')
+    if quote:
+        s = s.replace('"', r'\"')
+    return s
+
+def format_value(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+collector = None
+
+def enable(jobs=1):
+    global collector  # pylint: disable=global-statement
+    collector = Metrics(jobs=jobs)
+
+def add_file(path, size, seconds, tags):
+    if collector is not None:
+        collector.add_file(path, size, seconds, tags)
+
+def add_batch(queue_wait):
+    if collector is not None:
+        collector.add_batch(queue_wait)
+
+def time_walk(files):
+    if collector is None:
+        return files
+    return collector.time_walk(files)
+
+def write(path):
+    collector.write(path)
+
+__all__ = [
+    'add_batch',
+    'add_file',
+    'enable',
+    'time_walk',
+    'write',
+]
+
+# vim:ts=4 sts=4 sw=4 et
@@ -0,0 +1,393 @@
+# encoding=UTF-8
+
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+'''
+pydiatra process pool
+'''
+
+# Unlike concurrent.futures.ProcessPoolExecutor,
+# this pool can kill a worker process that exceeds the time limit,
+# and replace it with a new one, without breaking the whole pool.
+#
+# Every worker process talks to the main process over its own pipe.
+# The main process sends (function, args, kwargs) tuples,
+# or None to make the worker exit.
+# The worker replies with ("started", None),
+# then zero or more ("progress", value) messages,
+# followed by ("result", value, retiring) or ("error", exception, retiring),
+# where retiring is true if the worker is about to exit
+# (and should be replaced with a new one).
+# The worker can't be killed while nobody is looking,
+# so a thread in the main process takes care of the workers.
+# Because of that thread, replacement workers are not forked
+# from the main process, but started by a fork server (where available).
+
+import collections
+import multiprocessing
+import os
+import signal
+import threading
+import time
+
+try:
+    from multiprocessing.connection import wait as wait_for_connections
+except ImportError:  # Python < 3.3
+    import select
+    def wait_for_connections(conns, timeout=None):
+        rlist, _, _ = select.select(conns, [], [], timeout)
+        return rlist
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import concurrent.futures
+except ImportError:
+    # The main module takes care of reporting this.
+    pass
+
+class Timeout(Exception):
+    '''
+    the task exceeded the time limit
+
+    The progress attribute is the last value
+    that the task reported with report_progress(), or None.
+    The seconds attribute is the time limit.
+    '''
+
+    def __init__(self, progress=None, seconds=None):
+        Exception.__init__(self, progress, seconds)
+        self.progress = progress
+        self.seconds = seconds
+
+class WorkerDied(Exception):
+    '''
+    the worker process died while running the task
+
+    The progress attribute is the last value
+    that the task reported with report_progress(), or None.
+    '''
+
+    def __init__(self, progress=None, exitcode=None):
+        Exception.__init__(self, progress, exitcode)
+        self.progress = progress
+        self.exitcode = exitcode
+
+    def __str__(self):
+        if self.exitcode is not None and self.exitcode < 0:
+            return 'worker process killed by {0}'.format(get_signal_name(-self.exitcode))
+        return 'worker process died with exit code {0}'.format(self.exitcode)
+
+def get_signal_name(n):
+    try:
+        return signal.Signals(n).name  # pylint: disable=no-member
+    except (AttributeError, ValueError):  # Python < 3.5, or unknown signal
+        return str(n)
+
+# connection to the main process (in a worker process)
+_conn = None
+
+# whether this worker process should exit after the current task
+_retiring = False
+
+parent_check_interval = 1
+
+def report_progress(value):
+    '''
+    report progress of the current task to the main process;
+    this also resets the task's time limit
+
+    This is a no-op outside worker processes.
+    '''
+    if _conn is not None:
+        _conn.send(('progress', value))
+
+def retire():
+    '''
+    make this worker process exit after the current task,
+    and let the pool replace it with a new one
+
+    This is a no-op outside worker processes.
+    '''
+    global _retiring  # pylint: disable=global-statement
+    if _conn is not None:
+        _retiring = True
+
+def get_restart_context(preload=()):
+    '''
+    return the multiprocessing context
+    for starting worker processes while other threads are running
+    '''
+    try:
+        get_start_method = multiprocessing.get_start_method
+    except AttributeError:  # Python < 3.4
+        return multiprocessing
+    if get_start_method() != 'fork':
+        # "spawn" (Windows, macOS) or "forkserver" are safe.
+        return multiprocessing
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return multiprocessing
+    context = multiprocessing.get_context('forkserver')
+    context.set_forkserver_preload(list(preload))
+    return context
+
+def set_memory_limit(limit):
+    soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    if soft == resource.RLIM_INFINITY or limit < soft:
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+def _run_worker(conn, initializer, memory_limit):
+    global _conn  # pylint: disable=global-statement
+    if memory_limit is not None:
+        set_memory_limit(memory_limit)
+    if initializer is not None:
+        initializer()
+    _conn = conn
+    parent_pid = os.getppid()
+    while True:
+        # Other processes may hold copies of the main process's end of the pipe,
+        # so don't count on seeing EOF when the main process dies.
+        while not conn.poll(parent_check_interval):
+            if os.getppid() != parent_pid:
+                return
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        fn, args, kwargs = task
+        conn.send(('started', None))
+        try:
+            message = ('result', fn(*args, **kwargs), _retiring)
+        except Exception as exc:  # pylint: disable=broad-except
+            message = ('error', exc, _retiring)
+        try:
+            conn.send(message)
+        except Exception as exc:  # pylint: disable=broad-except
+            # most likely, the result couldn't be pickled
+            conn.send(('error', RuntimeError(repr(exc)), _retiring))
+        if _retiring:
+            break
+
+class Worker(object):
+
+    def __init__(self, pool, context=multiprocessing):
+        conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_run_worker,
+            args=(child_conn, pool.initializer, pool.memory_limit),
+        )
+        self.process.daemon = True
+        self.process.start()
+        child_conn.close()
+        self.conn = conn
+        self.future = None
+        self.progress = None
+        self.deadline = None
+
+    def stop(self, kill=False):
+        if kill:
+            self.process.terminate()
+        elif self.process.is_alive():
+            try:
+                self.conn.send(None)
+            except EnvironmentError:
+                pass
+        self.process.join()
+        self.conn.close()
+
+class Pool(object):  # pylint: disable=too-many-instance-attributes
+    '''
+    minimal replacement for concurrent.futures.ProcessPoolExecutor,
+    with optional limits for time and memory
+    '''
+
+    def __init__(self, max_workers, initializer=None, timeout=None, memory_limit=None, preload=()):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        '''
+        timeout is the number of seconds a task may run
+        without reporting progress;
+        memory_limit is the maximum size (in bytes)
+        of the virtual memory of every worker process;
+        preload is a list of names of modules
+        that the fork server should import upfront
+        '''
+        if memory_limit is not None and resource is None:
+            raise NotImplementedError('memory limit is not supported on this platform')
+        self.initializer = initializer
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        # (The fork server is started only when it's first needed.)
+        self._restart_context = get_restart_context(preload)
+        self._lock = threading.Lock()
+        self._queue = collections.deque()
+        self._shutdown = False
+        self._kill = False
+        self._wakeup_reader, self._wakeup_writer = multiprocessing.Pipe(duplex=False)
+        # Start the worker processes before any threads,
+        # as fork() in a multi-threaded process is unsafe.
+        self._workers = [Worker(self) for _ in range(max_workers)]
+        self._thread = threading.Thread(target=self._manage)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def submit(self, fn, *args, **kwargs):
+        future = concurrent.futures.Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError('cannot schedule new futures after shutdown')
+            self._queue.append((future, (fn, args, kwargs)))
+        self._wakeup_writer.send(None)
+        return future
+
+    def shutdown(self, wait=True, kill=False):
+        '''
+        cancel the pending tasks, and make the worker processes exit;
+        if kill is true, terminate the worker processes that are running tasks,
+        rather than wait for the tasks to finish
+        '''
+        with self._lock:
+            self._shutdown = True
+            self._kill = self._kill or kill
+            for future, _ in self._queue:
+                future.cancel()
+            self._queue.clear()
+        self._wakeup_writer.send(None)
+        if wait:
+            self._thread.join()
+
+    def _dispatch(self):
+        for worker in self._workers:
+            if worker.future is not None:
+                continue
+            while self._queue:
+                future, task = self._queue.popleft()
+                if future.set_running_or_notify_cancel():
+                    break
+            else:
+                return
+            worker.future = future
+            worker.progress = None
+            # The time limit starts only when the worker process starts the task,
+            # which may take a while if the process has just been started.
+            worker.deadline = None
+            try:
+                worker.conn.send(task)
+            except EnvironmentError:
+                self._replace(worker, WorkerDied())
+
+    def _reset_deadline(self, worker):
+        if self.timeout is not None:
+            worker.deadline = time.time() + self.timeout
+
+    def _restart(self, worker, kill=False):
+        worker.stop(kill=kill)
+        i = self._workers.index(worker)
+        if self._shutdown:
+            del self._workers[i]
+        else:
+            self._workers[i] = Worker(self, context=self._restart_context)
+
+    def _replace(self, worker, exc, kill=False):
+        self._restart(worker, kill=kill)
+        if isinstance(exc, WorkerDied):
+            exc.exitcode = worker.process.exitcode
+        future = worker.future
+        worker.future = None
+        future.set_exception(exc)
+
+    def _receive(self, worker):
+        while worker.future is not None and worker.conn.poll():
+            try:
+                message = worker.conn.recv()
+            except (EOFError, EnvironmentError):
+                self._replace(worker, WorkerDied(worker.progress))
+                return
+            kind, value = message[:2]
+            if kind == 'started':
+                self._reset_deadline(worker)
+                continue
+            if kind == 'progress':
+                worker.progress = value
+                self._reset_deadline(worker)
+                continue
+            future = worker.future
+            worker.future = None
+            if message[2]:
+                self._restart(worker)
+            if kind == 'result':
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    def _manage(self):
+        if hasattr(signal, 'pthread_sigmask'):
+            # Writing to the pipe of a dead worker should fail with EPIPE,
+            # rather than kill the main process.
+            signal.pthread_sigmask(signal.SIG_BLOCK, [signal.SIGPIPE])  # pylint: disable=no-member
+        while True:
+            with self._lock:
+                self._dispatch()
+                shutdown = self._shutdown
+                kill = self._kill
+            busy = [w for w in self._workers if w.future is not None]
+            if shutdown and (kill or not busy):
+                break
+            timeout = None
+            deadlines = [w.deadline for w in busy if w.deadline is not None]
+            if deadlines:
+                timeout = max(0, min(deadlines) - time.time())
+            conns = [w.conn for w in busy] + [self._wakeup_reader]
+            ready = wait_for_connections(conns, timeout)
+            if self._wakeup_reader in ready:
+                while self._wakeup_reader.poll():
+                    self._wakeup_reader.recv()
+            for worker in busy:
+                if worker.conn in ready:
+                    self._receive(worker)
+            if self.timeout is not None:
+                now = time.time()
+                for worker in busy:
+                    if worker.future is None or worker.deadline is None:
+                        continue
+                    if now >= worker.deadline:
+                        self._replace(worker, Timeout(worker.progress, self.timeout), kill=True)
+        for worker in self._workers:
+            future = worker.future
+            worker.stop(kill=future is not None)
+            if future is not None:
+                future.set_exception(WorkerDied(worker.progress, worker.process.exitcode))
+
+__all__ = [
+    'Pool',
+    'Timeout',
+    'WorkerDied',
+    'report_progress',
+    'retire',
+]
+
+# vim:ts=4 sts=4 sw=4 et
@@ -0,0 +1,205 @@
+# encoding=UTF-8
+
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+'''
+matching many regexps at once, with literal prefiltering
+'''
+
+import re
+import sys
+
+try:
+    import re._constants as sre_constants  # pylint: disable=ungrouped-imports
+    import re._parser as sre_parse  # pylint: disable=ungrouped-imports
+except ImportError:  # Python < 3.11
+    import sre_constants  # pylint: disable=deprecated-module
+    import sre_parse  # pylint: disable=deprecated-module
+
+# pylint: disable=redefined-builtin,self-assigning-variable
+if sys.version_info >= (3,):
+    unichr = chr
+else:
+    unichr = unichr
+# pylint: enable=redefined-builtin,self-assigning-variable
+
+def get_flags(subpattern):
+    try:
+        return subpattern.state.flags
+    except AttributeError:  # Python < 3.8
+        return subpattern.pattern.flags
+
+def required_literal(regexp, flags=0):
+    '''
+    return the longest substring that every match of the regexp must contain,
+    as far as can be cheaply determined;
+    or None
+    '''
+    subpattern = sre_parse.parse(regexp, flags)
+    if get_flags(subpattern) & re.IGNORECASE:
+        return
+    char = chr if isinstance(regexp, str) else unichr
+    best = run = regexp[:0]
+    for op, av in subpattern.data:
+        if op == sre_constants.LITERAL:  # pylint: disable=no-member
+            run += char(av)
+        else:
+            run = regexp[:0]
+        if len(run) > len(best):
+            best = run
+    return best or None
+
+def trie_regexp(words):
+    '''
+    return regexp that matches any of the words;
+    when several words match at the same position, it matches the longest one
+
+    The alternatives are factored into a trie,
+    so that matching at any position takes time proportional to the word length,
+    rather than to the number of words.
+    '''
+    trie = {}
+    for word in words:
+        node = trie
+        for c in word:
+            node = node.setdefault(c, {})
+        node[''] = None
+    def build(node):
+        alternatives = [
+            re.escape(c) + build(child)
+            for c, child in sorted(node.items())
+            if c
+        ]
+        if not alternatives:
+            return ''
+        if len(alternatives) == 1 and '' not in node:
+            return alternatives[0]
+        regexp = '(?:' + str.join('|', alternatives) + ')'
+        if '' in node:
+            regexp += '?'
+        return regexp
+    return build(trie)
+
+class MultiMatcher(object):
+    '''
+    find which of the regexps matches the string first,
+    as an alternation of all the regexps would;
+    only the regexps whose required literal occurs in the string are tried
+    '''
+
+    def __init__(self, regexps, flags=0):
+        regexps = list(regexps)
+        flags = int(flags)
+        # literal -> indices of regexps that require it
+        literals = {}
+        # indices of regexps that must be always tried
+        unfiltered = []
+        for i, regexp in enumerate(regexps):
+            literal = required_literal(regexp, flags)
+            if literal is None:
+                unfiltered += [i]
+            else:
+                literals.setdefault(literal, []).append(i)
+        # The literal scan finds only the longest literal at every position,
+        # so map it also to the regexps that require its prefixes.
+        candidates = {}
+        for literal in literals:
+            candidates[literal] = sorted(
+                i
+                for n in range(1, len(literal) + 1)
+                for i in literals.get(literal[:n], ())
+            )
+        literal_regexp = None
+        if literals:
+            literal_regexp = trie_regexp(literals)
+        self._set_state(regexps, flags, unfiltered, candidates, literal_regexp)
+
+    def _set_state(self, regexps, flags, unfiltered, candidates, literal_regexp):
+        # pylint: disable=attribute-defined-outside-init
+        self.regexps = regexps
+        self.flags = flags
+        self.unfiltered = unfiltered
+        self.candidates = candidates
+        self.literal_regexp = literal_regexp
+        # The regexps are compiled only when they are first needed.
+        self._compiled = {}
+        self._literal_regexps = None
+
+    def get_state(self):
+        '''
+        return the analysis results as a marshallable object
+        '''
+        return (self.regexps, self.flags, self.unfiltered, self.candidates, self.literal_regexp)
+
+    @classmethod
+    def from_state(cls, state):
+        '''
+        create matcher from the get_state() result,
+        without analyzing the regexps again
+        '''
+        self = cls.__new__(cls)
+        self._set_state(*state)  # pylint: disable=protected-access
+        return self
+
+    def _compile(self, i):
+        try:
+            return self._compiled[i]
+        except KeyError:
+            regexp = self._compiled[i] = re.compile(self.regexps[i], self.flags)
+            return regexp
+
+    def get_candidates(self, s):
+        candidates = set(self.unfiltered)
+        if self.literal_regexp is None:
+            return candidates
+        if self._literal_regexps is None:
+            self._literal_regexps = (
+                re.compile(self.literal_regexp),
+                re.compile('(?=(' + self.literal_regexp + '))'),
+            )
+        literal_regexp, overlapping_regexp = self._literal_regexps
+        if literal_regexp.search(s) is None:
+            # This is the common case.
+            return candidates
+        for literal in set(overlapping_regexp.findall(s)):
+            candidates.update(self.candidates[literal])
+        return candidates
+
+    def search(self, s):
+        '''
+        return the index of the regexp whose match starts first
+        (or, if there are several such, of the first of them);
+        or None if no regexp matches
+        '''
+        result = None
+        start = None
+        for i in sorted(self.get_candidates(s)):
+            match = self._compile(i).search(s)
+            if match is None:
+                continue
+            if start is None or match.start() < start:
+                start = match.start()
+                result = i
+        return result
+
+__all__ = ['MultiMatcher']
+
+# vim:ts=4 sts=4 sw=4 et
@@ -0,0 +1,264 @@
+# encoding=UTF-8
+
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+'''
+pydiatra profiler
+'''
+
+from __future__ import print_function
+
+import functools
+import time
+
+try:
+    clock = time.perf_counter  # pylint: disable=no-member
+except AttributeError:  # Python < 3.3
+    clock = time.time
+
+class Profiler(object):
+    '''
+    measure self time of nested steps
+
+    While a step is running, the time is charged to it;
+    while a nested step is running, the time is charged to the nested step.
+    '''
+
+    def __init__(self):
+        # name -> [number of calls, total time, maximum time per file, total size]
+        self.stats = {}
+        # name -> total time in the current file
+        self._file_times = {}
+        self._stack = []
+        self._start = None
+
+    def _get_stats(self, name):
+        try:
+            return self.stats[name]
+        except KeyError:
+            stats = self.stats[name] = [0, 0.0, 0.0, 0]
+            return stats
+
+    def _charge(self, now):
+        name = self._stack[-1][0]
+        self._file_times[name] = self._file_times.get(name, 0.0) + (now - self._start)
+
+    def count(self, name):
+        self._get_stats(name)[0] += 1
+
+    def add_size(self, name, size):
+        self._get_stats(name)[3] += size
+
+    def start(self, name, trace=True, args=None):
+        now = clock()
+        if self._stack:
+            self._charge(now)
+        trace = trace and tracer is not None
+        self._stack += [(name, trace)]
+        self._start = now
+        if trace:
+            tracer.begin(name, now, args)
+
+    def stop(self):
+        now = clock()
+        self._charge(now)
+        _, trace = self._stack.pop()
+        self._start = now
+        if trace:
+            tracer.end(now)
+
+    def end_file(self):
+        for name, t in self._file_times.items():
+            stats = self._get_stats(name)
+            stats[1] += t
+            stats[2] = max(stats[2], t)
+        self._file_times.clear()
+
+    def pop_stats(self):
+        stats = self.stats
+        self.stats = {}
+        return stats
+
+    def merge_stats(self, other):
+        for name, (n, t, max_t, size) in other.items():
+            stats = self._get_stats(name)
+            stats[0] += n
+            stats[1] += t
+            stats[2] = max(stats[2], max_t)
+            stats[3] += size
+
+profiler = None
+
+# set by tracing.enable()
+tracer = None
+
+class Timer(object):
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        profiler.count(self.name)
+        profiler.start(self.name, args=self.args)
+
+    def __exit__(self, exc_type, exc_value, tb):
+        profiler.stop()
+
+class NullTimer(object):
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, exc_type, exc_value, tb):
+        pass
+
+null_timer = NullTimer()
+
+def timer(name, **args):
+    '''
+    return context manager that times the step (if profiling is enabled);
+    the step must not yield;
+    args are recorded in the trace (if tracing is enabled)
+    '''
+    if profiler is None:
+        return null_timer
+    return Timer(name, args)
+
+def count(name):
+    '''
+    count the step without timing it (if profiling is enabled)
+    '''
+    if profiler is not None:
+        profiler.count(name)
+
+def add_size(name, size):
+    '''
+    add to the size of the data processed by the step (if profiling is enabled)
+    '''
+    if profiler is not None:
+        profiler.add_size(name, size)
+
+def wrap_generator(name, func, trace=False):
+    '''
+    time the generator function,
+    excluding the time spent by its consumer
+    '''
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        gen = func(*args, **kwargs)
+        profiler.count(name)
+        while True:
+            profiler.start(name, trace=trace)
+            try:
+                item = next(gen)
+            except StopIteration:
+                return
+            finally:
+                profiler.stop()
+            yield item
+    return wrapper
+
+def wrap_function(name, func, trace=False):
+    '''
+    time the function
+    '''
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profiler.count(name)
+        profiler.start(name, trace=trace)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.stop()
+    return wrapper
+
+def instrument_function(module, attr, trace=False):
+    '''
+    time the generator function in the module
+    '''
+    func = getattr(module, attr)
+    name = '{mod}.{attr}'.format(mod=module.__name__.rpartition('.')[2], attr=attr)
+    setattr(module, attr, wrap_generator(name, func, trace=trace))
+
+def enable():
+    '''
+    enable profiling;
+    return False if it was already enabled
+    '''
+    global profiler  # pylint: disable=global-statement
+    if profiler is not None:
+        return False
+    profiler = Profiler()
+    return True
+
+def enabled():
+    return profiler is not None
+
+def end_file():
+    if profiler is not None:
+        profiler.end_file()
+
+def pop_stats():
+    if profiler is None:
+        return
+    return profiler.pop_stats()
+
+def merge_stats(stats):
+    if stats:
+        profiler.merge_stats(stats)
+
+def print_report(file):
+    '''
+    print the steps sorted by their total self time,
+    together with the number of calls and the maximum self time per file;
+    then print the sizes of the data processed by the steps, if known
+    '''
+    stats = profiler.stats
+    grand_total = sum(t for _, t, _, _ in stats.values())
+    header = '{0:>9} {1:>10} {2:>6} {3:>10}  {4}'
+    row = '{0:9d} {1:10.3f} {2:6.1f} {3:10.3f}  {4}'
+    footer = '{0:>9} {1:10.3f} {2:6.1f} {3:>10}  {4}'
+    print(header.format('calls', 'self [s]', '%', 'max [s]', 'step'), file=file)
+    for name, (n, t, max_t, _) in sorted(stats.items(), key=lambda item: (-item[1][1], item[0])):
+        print(row.format(n, t, 100.0 * t / (grand_total or 1), max_t, name), file=file)
+    print(footer.format('', grand_total, 100.0, '', '(total)'), file=file)
+    sizes = [(name, size) for name, (_, _, _, size) in sorted(stats.items()) if size]
+    if sizes:
+        print(file=file)
+        print('{0:>9}  {1}'.format('size', 'step'), file=file)
+        for name, size in sizes:
+            print('{0:9d}  {1}'.format(size, name), file=file)
+
+__all__ = [
+    'add_size',
+    'count',
+    'enable',
+    'enabled',
+    'end_file',
+    'instrument_function',
+    'merge_stats',
+    'pop_stats',
+    'print_report',
+    'timer',
+]
+
+# vim:ts=4 sts=4 sw=4 et
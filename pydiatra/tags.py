@@ -1,6 +1,6 @@
 # encoding=UTF-8
 
-# Copyright © 2014-2022 Jakub Wilk <jwilk@jwilk.net>
+# Copyright © 2014-2026 Jakub Wilk <jwilk@jwilk.net>
 #
 # Permission is hereby granted, free of charge, to any person obtaining a copy
 # of this software and associated documentation files (the “Software”), to deal
@@ -24,6 +24,23 @@
 pydiatra tags
 '''
 
+import os
+
+json_encoder = None
+
+def get_json_encoder():
+    # This is needed only for the JSON output format, so import it only here.
+    global json_encoder  # pylint: disable=global-statement
+    if json_encoder is None:
+        import json  # pylint: disable=import-outside-toplevel
+        json_encoder = json.JSONEncoder(separators=(',', ':'))
+    return json_encoder
+
+def json_arg(arg):
+    if isinstance(arg, (int, str)):
+        return arg
+    return str(arg)
+
 class Tag(object):
 
     def __init__(self, path, location, *args):
@@ -48,6 +65,110 @@ class Tag(object):
         message = str.join(' ', map(str, self.args))
         return '{loc}: {msg}'.format(loc=location, msg=message)
 
-__all__ = ['Tag']
+    def as_tuple(self):
+        '''
+        return compact representation of the tag (without the path),
+        suitable for marshal and pickle;
+        Tag(path, *t.as_tuple()) recreates the tag
+        '''
+        return (self.lineno,) + tuple(self.args)
+
+    def as_json(self):
+        '''
+        return JSON representation of the tag
+        '''
+        encode = get_json_encoder().encode
+        return '{{"path":{path},"line":{line},"tag":{tag},"args":{args}}}'.format(
+            path=encode(self.path),
+            line=encode(self.lineno),
+            tag=encode(self.name),
+            args=encode([json_arg(arg) for arg in self.args[1:]]),
+        )
+
+datadir = os.path.join(os.path.dirname(__file__), 'data')
+
+severities = ['wishlist', 'minor', 'normal', 'important', 'serious']
+certainties = ['wild-guess', 'possible', 'certain']
+
+def load_info():
+    '''
+    return dict that maps tag names to (severity, certainty) pairs
+    '''
+    # This is needed only for tag selection, so import it only here.
+    # pylint: disable=import-outside-toplevel
+    if str is bytes:
+        import ConfigParser as configparser  # pylint: disable=import-error
+    else:
+        import configparser
+    # pylint: enable=import-outside-toplevel
+    cp = configparser.RawConfigParser()
+    path = os.path.join(datadir, 'tags')
+    options = {}
+    if str is not bytes:
+        options.update(encoding='UTF-8')
+    cp.read(path, **options)
+    return dict(
+        (name, (cp.get(name, 'severity'), cp.get(name, 'certainty')))
+        for name in cp.sections()
+    )
+
+class Selection(object):
+    '''
+    set of tags to report
+
+    A tag is selected if it matches one of the enable patterns (if any),
+    doesn't match any of the disable patterns,
+    and is at least as severe and as certain as requested.
+    Private tags are always selected.
+    '''
+
+    def __init__(self, enable=(), disable=(), min_severity=None, min_certainty=None):
+        self.enable = sorted(set(enable))
+        self.disable = sorted(set(disable))
+        self.min_severity = min_severity
+        self.min_certainty = min_certainty
+        info = load_info()
+        # This is needed only for tag selection, so import it only here.
+        import fnmatch  # pylint: disable=import-outside-toplevel
+        for pattern in self.enable + self.disable:
+            if not fnmatch.filter(info, pattern):
+                raise ValueError('unknown tag: {pat}'.format(pat=pattern))
+        self.names = frozenset(
+            name for name, (severity, certainty) in info.items()
+            if self._is_selected(name, severity, certainty)
+        )
+
+    def _is_selected(self, name, severity, certainty):
+        import fnmatch  # pylint: disable=import-outside-toplevel
+        if self.enable and not any(fnmatch.fnmatchcase(name, p) for p in self.enable):
+            return False
+        if any(fnmatch.fnmatchcase(name, p) for p in self.disable):
+            return False
+        if self.min_severity is not None:
+            if severities.index(severity) < severities.index(self.min_severity):
+                return False
+        if self.min_certainty is not None:
+            if certainties.index(certainty) < certainties.index(self.min_certainty):
+                return False
+        return True
+
+    def __contains__(self, name):
+        return name in self.names or name[0] == '*'
+
+    def any(self, names):
+        '''
+        return True if any of the tags is selected
+        '''
+        return any(name in self for name in names)
+
+    def __str__(self):
+        return str.join(' ', sorted(self.names))
+
+__all__ = [
+    'Selection',
+    'Tag',
+    'certainties',
+    'severities',
+]
 
 # vim:ts=4 sts=4 sw=4 et
@@ -0,0 +1,169 @@
+# encoding=UTF-8
+
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+'''
+pydiatra timeline tracer
+'''
+
+import os
+import threading
+import time
+
+from . import profiling
+
+clock = profiling.clock
+
+class Tracer(object):
+    '''
+    record spans of time as Chrome trace events
+    '''
+
+    def __init__(self, process_name):
+        self.pid = os.getpid()
+        self.events = [
+            dict(name='process_name', ph='M', pid=self.pid, args=dict(name=process_name)),
+        ]
+        self._stack = []
+        # clock() is precise, but its epoch may be different in every process;
+        # time.time() is shared by all the processes.
+        self._offset = time.time() - clock()
+
+    def begin(self, name, now=None, args=None):
+        if now is None:
+            now = clock()
+        self._stack += [(name, now, args)]
+
+    def end(self, now=None):
+        if now is None:
+            now = clock()
+        name, start, args = self._stack.pop()
+        event = dict(
+            name=name,
+            ph='X',
+            ts=round((start + self._offset) * 1E6, 3),
+            dur=round((now - start) * 1E6, 3),
+            pid=self.pid,
+            tid=threading.current_thread().ident,
+        )
+        if args:
+            event['args'] = args
+        self.events += [event]
+
+    def pop_events(self):
+        events = self.events
+        self.events = []
+        return events
+
+tracer = None
+
+class Span(object):
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        tracer.begin(self.name, args=self.args)
+
+    def __exit__(self, exc_type, exc_value, tb):
+        tracer.end()
+
+def span(name, **args):
+    '''
+    return context manager that records the span (if tracing is enabled);
+    the span must not yield
+    '''
+    if tracer is None:
+        return profiling.null_timer
+    return Span(name, args)
+
+def trace_iter(name, iterable):
+    '''
+    generate the items of the iterable,
+    recording how long it takes to produce each of them
+    '''
+    if tracer is None:
+        return iterable
+    return _trace_iter(name, iterable)
+
+def _trace_iter(name, iterable):
+    iterator = iter(iterable)
+    while True:
+        tracer.begin(name)
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            tracer.end()
+        yield item
+
+def enable(process_name):
+    '''
+    enable tracing;
+    return False if it was already enabled
+    '''
+    global tracer  # pylint: disable=global-statement
+    if tracer is not None and tracer.pid == os.getpid():
+        return False
+    # A forked worker process inherits the tracer of the main process,
+    # but it needs its own.
+    tracer = Tracer(process_name)
+    profiling.tracer = tracer
+    return True
+
+def enabled():
+    return tracer is not None
+
+def pop_events():
+    if tracer is None:
+        return
+    return tracer.pop_events()
+
+def merge_events(events):
+    if events:
+        tracer.events += events
+
+def write(path):
+    '''
+    write the trace in the Chrome trace event format
+    '''
+    # This is needed only with --trace-file, so import it only here.
+    import json  # pylint: disable=import-outside-toplevel
+    data = dict(traceEvents=tracer.events, displayTimeUnit='ms')
+    # The output is pure ASCII, as non-ASCII characters are escaped.
+    data = json.dumps(data, sort_keys=True) + '\n'
+    with open(path, 'wb') as file:
+        file.write(data.encode('ASCII'))
+
+__all__ = [
+    'enable',
+    'enabled',
+    'merge_events',
+    'pop_events',
+    'span',
+    'trace_iter',
+    'write',
+]
+
+# vim:ts=4 sts=4 sw=4 et
@@ -1,6 +1,6 @@
 # encoding=UTF-8
 
-# Copyright © 2015-2022 Jakub Wilk <jwilk@jwilk.net>
+# Copyright © 2015-2026 Jakub Wilk <jwilk@jwilk.net>
 #
 # Permission is hereby granted, free of charge, to any person obtaining a copy
 # of this software and associated documentation files (the “Software”), to deal
@@ -25,6 +25,42 @@ pydiatra helper functions
 '''
 
 import contextlib
+import os
+import sys
+import threading
+import types
+import warnings
+
+try:
+    replace = os.replace  # pylint: disable=no-member
+except AttributeError:  # Python < 3.3
+    replace = os.rename
+
+if sys.version_info >= (3,):
+    fsencode = os.fsencode  # pylint: disable=no-member
+    fsdecode = os.fsdecode  # pylint: disable=no-member
+else:
+    fsencode = fsdecode = str
+
+def write_atomically(path, data, mode=None):
+    '''
+    write the bytes to the file atomically,
+    so that readers never see partial contents;
+    mode is the permissions of the file (default: readable only by the owner)
+    '''
+    # This is needed only for the cache and the bundle, so import it only here.
+    import tempfile  # pylint: disable=import-outside-toplevel
+    dirpath = os.path.dirname(path) or os.curdir
+    fd, tmp_path = tempfile.mkstemp(prefix='.tmp', dir=dirpath)
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data)
+        if mode is not None:
+            os.chmod(tmp_path, mode)
+        replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
 
 class ExceptionContext(object):
 
@@ -64,9 +100,102 @@ def monkeypatch(obj, **kwargs):
             setattr(obj, name, value)
 # pylint: enable=undefined-loop-variable
 
+def load_private_copy(module):
+    '''
+    load a fresh copy of the module, which is not registered in sys.modules,
+    so that it can be modified without affecting other users of the module
+    '''
+    name = module.__name__
+    try:
+        loader = module.__loader__
+    except AttributeError:  # Python 2.X
+        import pkgutil  # pylint: disable=import-outside-toplevel
+        loader = pkgutil.get_loader(name)
+    code = loader.get_code(name)
+    copy = types.ModuleType(name)
+    # for relative imports:
+    copy.__package__ = module.__package__
+    exec(code, vars(copy))  # pylint: disable=exec-used
+    return copy
+
+class WarningLogs(threading.local):
+    '''
+    per-thread stack of lists that warnings are recorded into
+    '''
+
+    def __init__(self):
+        super(WarningLogs, self).__init__()
+        self.stack = []
+
+# set by make_warnings_thread_safe()
+warning_logs = None
+original_showwarning = None
+
+class RecordedWarningMeta(type):
+
+    def __subclasscheck__(cls, subclass):
+        return bool(warning_logs.stack)
+
+# Every warning category is a subclass of RecordedWarning,
+# but only when emitted in the record_warnings() block.
+RecordedWarning = RecordedWarningMeta('RecordedWarning', (Warning,), {})
+
+def showwarning(message, category, filename, lineno, file=None, line=None):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    stack = warning_logs.stack
+    if not stack:
+        original_showwarning(message, category, filename, lineno, file, line)
+        return
+    stack[-1] += [warnings.WarningMessage(message, category, filename, lineno, file, line)]
+
+def make_warnings_thread_safe():
+    '''
+    make record_warnings() safe to use in threads
+
+    warnings.catch_warnings() swaps process-wide state,
+    so instead install a warning handler and filter once,
+    and let them find out whether (and where) to record the warning.
+    Warnings emitted outside record_warnings() blocks
+    are handled by the original filters and handler.
+    '''
+    global warning_logs, original_showwarning  # pylint: disable=global-statement
+    if warning_logs is not None:
+        return
+    warning_logs = WarningLogs()
+    original_showwarning = warnings.showwarning
+    warnings.filterwarnings('always', category=RecordedWarning)
+    warnings.showwarning = showwarning
+
+@contextlib.contextmanager
+def record_warnings():
+    '''
+    record warnings emitted in the block into a list
+
+    This is like catch_warnings(record=True) with the "always" filter,
+    but it's thread-safe if make_warnings_thread_safe() was called.
+    Repeated warnings are not suppressed.
+    '''
+    if warning_logs is None:
+        with warnings.catch_warnings(record=True) as log:
+            warnings.simplefilter('always')
+            yield log
+        return
+    log = []
+    warning_logs.stack += [log]
+    try:
+        yield log
+    finally:
+        warning_logs.stack.pop()
+
 __all__ = [
     'catch_exceptions',
+    'fsdecode',
+    'fsencode',
+    'load_private_copy',
+    'make_warnings_thread_safe',
     'monkeypatch',
+    'record_warnings',
+    'replace',
+    'write_atomically',
 ]
 
 # vim:ts=4 sts=4 sw=4 et
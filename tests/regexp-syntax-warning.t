@@ -0,0 +1,8 @@
+import re
+
+re.compile('[[a]')
+## [>= 3.7] *: regexp-syntax-warning Possible nested set at position 1
+re.compile('[[a]')
+## [>= 3.7] *: regexp-syntax-warning Possible nested set at position 1
+
+# vim:ts=4 sts=4 sw=4 et ft=python
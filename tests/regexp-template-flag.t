@@ -0,0 +1,8 @@
+import re
+
+re.compile('a', re.TEMPLATE)
+## [3.11-3.12] *: regexp-syntax-warning The re.TEMPLATE/re.T flag is deprecated as it is an undocumented flag without an obvious purpose. Don't use it.
+re.compile('a', re.T)
+## [3.11-3.12] *: regexp-syntax-warning The re.TEMPLATE/re.T flag is deprecated as it is an undocumented flag without an obvious purpose. Don't use it.
+
+# vim:ts=4 sts=4 sw=4 et ft=python
@@ -0,0 +1,70 @@
+# encoding=UTF-8
+
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+
+from nose.tools import (  # pylint: disable=no-name-in-module
+    assert_equal,
+    assert_is_none,
+    assert_is_not_none,
+    assert_raises,
+)
+
+import tools
+
+from pydiatra import checks
+from pydiatra import utils
+
+def test_bundle():
+    data = checks.read_data()
+    with tools.temporary_directory() as tmpdir:
+        bundle_dir = os.path.join(tmpdir, 'pydiatra')
+        with utils.monkeypatch(checks, bundle_dir=bundle_dir):
+            assert_is_none(checks.load_bundle())
+            checks.save_bundle(data)
+            assert_equal(checks.load_bundle(), data)
+            with utils.monkeypatch(checks, bundled_files=checks.bundled_files[1:]):
+                # stale bundle
+                assert_is_none(checks.load_bundle())
+
+def test_broken_bundle():
+    with tools.temporary_directory() as tmpdir:
+        bundle_dir = os.path.join(tmpdir, 'pydiatra')
+        with utils.monkeypatch(checks, bundle_dir=bundle_dir):
+            # up to date, but in a different format
+            checks.save_bundle(('eggs', 'ham'))
+            with assert_raises(ValueError):
+                checks.unpack_data(checks.load_bundle())
+            with utils.monkeypatch(checks,
+                builtin_exception_types=set(),
+                pil_modules=set(),
+                errno_constants={},
+                code_copies=[],
+                code_copies_matcher=None,
+            ):
+                checks.load_data()
+                assert_is_not_none(checks.code_copies_matcher)
+                assert_equal(len(checks.code_copies), len(checks.read_data()[3]))
+            # The bundle was rebuilt:
+            assert_equal(checks.load_bundle(), checks.read_data())
+
+# vim:ts=4 sts=4 sw=4 et
@@ -0,0 +1,101 @@
+# encoding=UTF-8
+
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import marshal
+import os
+import sys
+
+from nose.tools import (  # pylint: disable=no-name-in-module
+    assert_equal,
+)
+
+import tools
+
+def count_entries(path):
+    return sum(
+        len([f for f in files if not f.startswith('.')])
+        for dirpath, _, files in os.walk(path)
+        if dirpath != path  # skip the regexp memo
+    )
+
+def test():
+    paths = [
+        os.path.join(tools.here, 'bare-except.t'),
+        os.path.join(tools.here, 'syntax-error.t'),
+        os.path.join(tools.here, 'test_cache.py'),
+    ]
+    paths = [os.path.relpath(path) for path in paths]
+    expected = [
+        '{path}:5: bare-except'.format(path=paths[0]),
+        '{path}:1: syntax-error invalid syntax'.format(path=paths[1]),
+    ]
+    with tools.temporary_directory() as tmpdir:
+        options = ['--cache-dir', tmpdir]
+        for parallel in (None, 2, None):
+            tools.run_pydiatra(paths, expected, parallel=parallel, options=options)
+            assert count_entries(tmpdir) == len(paths)
+        tools.run_pydiatra(paths, expected, options=options + ['--cache-size=1'])
+        assert count_entries(tmpdir) == 1
+
+def test_same_contents():
+    # The results mustn't be shared between files with the same contents,
+    # because tag arguments can mention the path.
+    with tools.temporary_directory() as tmpdir:
+        paths = [os.path.join(tmpdir, name) for name in ('a.py', 'b.py')]
+        for path in paths:
+            with open(path, 'wt') as file:  # pylint: disable=unspecified-encoding
+                file.write('# encoding=UTF-42\n')
+        if sys.version_info >= (3, 3):
+            message = "unknown encoding for '{path}': UTF-42"
+        else:
+            message = 'unknown encoding: UTF-42'
+        expected = [
+            '{path}: syntax-error '.format(path=path) + message.format(path=path)
+            for path in paths
+        ]
+        options = ['--cache-dir', os.path.join(tmpdir, 'cache')]
+        for _ in range(2):
+            tools.run_pydiatra(paths, expected, options=options)
+
+def test_regexp_memo():
+    with tools.temporary_directory() as tmpdir:
+        path = os.path.join(tmpdir, 'test.py')
+        cache_dir = os.path.join(tmpdir, 'cache')
+        options = ['--cache-dir', cache_dir]
+        for n, parallel in enumerate((2, None), 2):
+            # Change the file every time,
+            # so that only the regexp memo can be used.
+            code = 'import re\n' * (n - 1) + "re.compile('[a-za-z]')\n"
+            with open(path, 'wt') as file:  # pylint: disable=unspecified-encoding
+                file.write(code)
+            expected = [
+                '{path}:{n}: regexp-duplicate-range a-z'.format(path=path, n=n),
+            ]
+            tools.run_pydiatra([path], expected, parallel=parallel, options=options)
+            # The salt depends on sys.flags, which may be different here,
+            # so don't use load_regexp_memo().
+            with open(os.path.join(cache_dir, 'regexps'), 'rb') as file:
+                _, memo = marshal.load(file)
+            assert_equal(list(memo.values()), [(('regexp-duplicate-range', 'a-z'),)])
+
+# vim:ts=4 sts=4 sw=4 et
@@ -1,6 +1,6 @@
 # encoding=UTF-8
 
-# Copyright © 2017-2022 Jakub Wilk <jwilk@jwilk.net>
+# Copyright © 2017-2026 Jakub Wilk <jwilk@jwilk.net>
 #
 # Permission is hereby granted, free of charge, to any person obtaining a copy
 # of this software and associated documentation files (the “Software”), to deal
@@ -20,24 +20,13 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-import contextlib
 import os
-import shutil
 import sys
-import tempfile
 
 import tools
 
-@contextlib.contextmanager
-def temporary_directory():
-    tmpdir = tempfile.mkdtemp(prefix='pydiatra.')
-    try:
-        yield tmpdir
-    finally:
-        shutil.rmtree(tmpdir)
-
 def test():
-    with temporary_directory() as tmpdir:
+    with tools.temporary_directory() as tmpdir:
         path = os.path.join(tmpdir, 'concurrent')
         os.mkdir(path)
         path = os.path.join(path, '__init__.py')
@@ -0,0 +1,148 @@
+# encoding=UTF-8
+
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import io
+import os
+import signal
+import socket
+import subprocess as ipc
+import sys
+import threading
+import time
+
+from nose import SkipTest
+
+import tools
+
+from pydiatra import daemon as pydiatra_daemon
+from pydiatra import utils
+
+def run_client(socket_path, paths, stdin=None):
+    env = dict(os.environ, PYTHONPATH=os.path.abspath(tools.basedir))
+    commandline = [sys.executable, '-m', 'pydiatra.client', '--stdin-name=stdin.py', socket_path] + paths
+    client = ipc.Popen(commandline,  # pylint: disable=consider-using-with
+        stdin=ipc.PIPE,
+        stdout=ipc.PIPE,
+        stderr=ipc.PIPE,
+        env=env,
+    )
+    stdout, stderr = client.communicate(stdin)
+    return client.returncode, stdout.decode('UTF-8'), stderr.decode('UTF-8')
+
+def test():
+    if not hasattr(socket, 'AF_UNIX'):
+        raise SkipTest
+    with tools.temporary_directory() as tmpdir:
+        path = os.path.join(tmpdir, 'eggs.py')
+        with open(path, 'wt') as file:  # pylint: disable=unspecified-encoding
+            file.write("raise 'eggs'\n")
+        socket_path = os.path.join(tmpdir, 'socket')
+        # The paths are relative to the daemon's working directory,
+        # which is different from the client's one.
+        commandline = [sys.executable, os.path.abspath(tools.script), '--daemon', 'socket', '--cache-dir', 'cache']
+        def preexec_fn():
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+        daemon = ipc.Popen(commandline,  # pylint: disable=consider-using-with,subprocess-popen-preexec-fn
+            preexec_fn=preexec_fn,
+            cwd=tmpdir,
+        )
+        watchdog = threading.Timer(30, daemon.kill)
+        watchdog.start()
+        try:
+            while not os.path.exists(socket_path):
+                assert daemon.poll() is None
+                time.sleep(0.05)
+            rc, stdout, stderr = run_client(socket_path, [tmpdir, '-'], stdin=b"\n\nraise 'ham'\n")
+            assert stderr == '', repr(stderr)
+            assert stdout == (
+                '{path}:1: string-exception\n'
+                'stdin.py:3: string-exception\n'
+            ).format(path=path), repr(stdout)
+            assert rc == 2, 'client exited with status {rc}'.format(rc=rc)
+            rc, stdout, stderr = run_client(socket_path, ['-'], stdin=b'# encoding=UTF-42\n')
+            if sys.version_info >= (3, 3):
+                # the same message as for files read from disk
+                assert stdout == "stdin.py: syntax-error unknown encoding for 'stdin.py': UTF-42\n", repr(stdout)
+            rc, stdout, stderr = run_client(socket_path, [os.path.join(tmpdir, 'nonexistent.py')])
+            assert rc == 1, 'client exited with status {rc}'.format(rc=rc)
+            daemon.send_signal(signal.SIGINT)
+            rc = daemon.wait()
+        finally:
+            watchdog.cancel()
+            if daemon.poll() is None:
+                daemon.kill()
+                daemon.wait()
+        assert rc == 0, 'daemon exited with status {rc}'.format(rc=rc)
+        assert not os.path.exists(socket_path)
+        assert os.path.isdir(os.path.join(tmpdir, 'cache'))
+        # The client should work without the daemon, too:
+        rc, stdout, stderr = run_client(socket_path, [path])
+        assert 'cannot connect to daemon' in stderr, repr(stderr)
+        assert stdout == '{path}:1: string-exception\n'.format(path=path), repr(stdout)
+        assert rc == 2, 'client exited with status {rc}'.format(rc=rc)
+
+def test_stuck_client():
+    if not hasattr(socket, 'AF_UNIX'):
+        raise SkipTest
+    def handler(request, file):
+        if request.items[0][0] == 'exit':
+            raise SystemExit
+        file.write('ok\n')
+        return True
+    # (The daemon changes the working directory to the client's one.)
+    cwd = os.getcwd()
+    def send_request(socket_path, path, output):
+        request = pydiatra_daemon.Request(cwd, items=[(path, None)])
+        return pydiatra_daemon.send_request(socket_path, request, output)
+    with tools.temporary_directory() as tmpdir:
+        socket_path = os.path.join(tmpdir, 'socket')
+        sock = pydiatra_daemon.bind(socket_path)
+        with utils.monkeypatch(pydiatra_daemon, client_timeout=0.5):
+            server = threading.Thread(target=pydiatra_daemon.serve, args=(sock, handler))
+            server.daemon = True
+            server.start()
+            try:
+                # This client connects, but never finishes its request:
+                stuck_client = pydiatra_daemon.connect(socket_path)
+                try:
+                    output = io.BytesIO()
+                    statuses = []
+                    client = threading.Thread(
+                        target=lambda: statuses.append(send_request(socket_path, 'eggs.py', output))
+                    )
+                    client.daemon = True
+                    client.start()
+                    client.join(10)
+                    assert statuses == [(0, None)], 'the other client was not served'
+                    assert output.getvalue() == b'ok\n', repr(output.getvalue())
+                finally:
+                    stuck_client.close()
+            finally:
+                try:
+                    send_request(socket_path, 'exit', io.BytesIO())
+                except pydiatra_daemon.ProtocolError:
+                    pass
+                server.join()
+                sock.close()
+
+# vim:ts=4 sts=4 sw=4 et
@@ -0,0 +1,46 @@
+# encoding=UTF-8
+
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import json
+import os
+
+import tools
+
+def test_json():
+    paths = [
+        os.path.join(tools.here, 'bare-except.t'),
+        os.path.join(tools.here, 'syntax-error.t'),
+        os.path.join(tools.here, 'test_format.py'),
+    ]
+    paths = [os.path.relpath(path) for path in paths]
+    # (On Windows, the paths contain backslashes, which must be escaped.)
+    json_paths = [json.dumps(path) for path in paths]
+    expected = [
+        '{{"path":{path},"line":5,"tag":"bare-except","args":[]}}'.format(path=json_paths[0]),
+        '{{"path":{path},"line":1,"tag":"syntax-error","args":["invalid syntax"]}}'.format(path=json_paths[1]),
+        '{{"path":{path},"line":null,"tag":"OK","args":[]}}'.format(path=json_paths[2]),
+    ]
+    for parallel in (None, 2):
+        tools.run_pydiatra(paths, expected, parallel=parallel, options=['--format=json', '-v'])
+
+# vim:ts=4 sts=4 sw=4 et
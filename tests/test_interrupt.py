@@ -0,0 +1,64 @@
+# encoding=UTF-8
+
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import signal
+import subprocess as ipc
+import sys
+import threading
+import time
+
+from nose import SkipTest
+
+import tools
+
+def test():
+    if os.name == 'nt':
+        raise SkipTest
+    with tools.temporary_directory() as tmpdir:
+        path = os.path.join(tmpdir, 'slow.py')
+        with open(path, 'wt') as file:  # pylint: disable=unspecified-encoding
+            # Parsing this regular expression takes tens of seconds.
+            file.write('import re\nre.compile({0!r})\n'.format('ab' * 3000000))
+        for options in ([], ['--watch']):
+            commandline = [sys.executable, tools.script, '-j2'] + options + [tmpdir]
+            def preexec_fn():
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+            checker = ipc.Popen(commandline,  # pylint: disable=consider-using-with,subprocess-popen-preexec-fn
+                stdout=ipc.PIPE,
+                stderr=ipc.PIPE,
+                preexec_fn=preexec_fn,
+            )
+            watchdog = threading.Timer(60, checker.kill)
+            watchdog.start()
+            try:
+                time.sleep(1)
+                start = time.time()
+                checker.send_signal(signal.SIGINT)
+                checker.communicate()
+                elapsed = time.time() - start
+            finally:
+                watchdog.cancel()
+            # Don't wait for the file that's being checked.
+            assert elapsed < 5, 'command exited {0:.1f} s after ^C'.format(elapsed)
+
+# vim:ts=4 sts=4 sw=4 et
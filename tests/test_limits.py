@@ -0,0 +1,102 @@
+# encoding=UTF-8
+
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import collections
+import glob
+import json
+import os
+import subprocess as ipc
+import sys
+
+from nose import SkipTest
+
+import tools
+
+def write_file(path, source):
+    with open(path, 'wt') as file:  # pylint: disable=unspecified-encoding
+        file.write(source)
+
+def test_timeout():
+    good_path = os.path.relpath(os.path.join(tools.here, 'bare-except.t'))
+    with tools.temporary_directory() as tmpdir:
+        slow_path = os.path.join(tmpdir, 'slow.py')
+        # Parsing this regular expression takes seconds.
+        write_file(slow_path, 'import re\nre.compile({0!r})\n'.format('ab' * 300000))
+        paths = [slow_path, good_path]
+        expected = [
+            '{path}: resource-limit-exceeded time'.format(path=slow_path),
+            '{path}:5: bare-except'.format(path=good_path),
+        ]
+        for parallel in (None, 2):
+            tools.run_pydiatra(paths, expected, parallel=parallel, options=['--timeout', '0.5'])
+
+def test_max_per_worker():
+    paths = [
+        os.path.join(tools.here, 'bare-except.t'),
+        os.path.join(tools.here, 'syntax-error.t'),
+        os.path.join(tools.here, 'return-outside-function.t'),
+    ]
+    paths = [os.path.relpath(path) for path in paths]
+    expected = [
+        '{path}:5: bare-except'.format(path=paths[0]),
+        '{path}:1: syntax-error invalid syntax'.format(path=paths[1]),
+        "{path}:2: syntax-error 'return' outside function".format(path=paths[2]),
+    ]
+    for options in (['--max-files-per-worker', '1'], ['--max-bytes-per-worker', '1K']):
+        tools.run_pydiatra(paths, expected, parallel=2, options=options)
+
+def test_max_files_per_worker_batches():
+    paths = sorted(glob.glob(os.path.join(tools.here, '*.t')))[:40]
+    with tools.temporary_directory() as tmpdir:
+        trace_path = os.path.join(tmpdir, 'trace.json')
+        options = ['-j2', '--max-files-per-worker', '3', '--trace-file', trace_path]
+        commandline = [sys.executable, tools.script] + options + paths
+        ipc.call(commandline, stdout=ipc.PIPE)
+        with open(trace_path, 'rb') as file:
+            trace = json.loads(file.read().decode('UTF-8'))
+    checked = collections.Counter(
+        e['pid'] for e in trace['traceEvents']
+        if e['ph'] == 'X' and e['name'] == 'check_file'
+    )
+    assert sum(checked.values()) == len(paths), repr(checked)
+    # Batches can be bigger than the limit,
+    # but the worker process must stop once it reaches it.
+    assert max(checked.values()) <= 3, repr(checked)
+
+def test_memory_limit():
+    if os.name != 'posix':
+        raise SkipTest('memory limit is not supported on this platform')
+    good_path = os.path.relpath(os.path.join(tools.here, 'bare-except.t'))
+    with tools.temporary_directory() as tmpdir:
+        big_path = os.path.join(tmpdir, 'big.py')
+        # Evaluating this expression requires 2 GB of memory.
+        write_file(big_path, 'x = {0!r} % 0\n'.format('%2000000000d'))
+        paths = [big_path, good_path]
+        expected = [
+            '{path}: resource-limit-exceeded memory'.format(path=big_path),
+            '{path}:5: bare-except'.format(path=good_path),
+        ]
+        for parallel in (None, 2):
+            tools.run_pydiatra(paths, expected, parallel=parallel, options=['--memory-limit', '512'])
+
+# vim:ts=4 sts=4 sw=4 et
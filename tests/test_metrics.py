@@ -0,0 +1,54 @@
+# encoding=UTF-8
+
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import os
+import subprocess as ipc
+import sys
+
+import tools
+
+def test():
+    paths = [
+        os.path.join(tools.here, 'regexp-syntax-error.t'),
+        os.path.join(tools.here, 'bare-except.t'),
+    ]
+    for options in ([], ['-j2']):
+        with tools.temporary_directory() as tmpdir:
+            metrics_path = os.path.join(tmpdir, 'pydiatra.prom')
+            commandline = [sys.executable, tools.script, '--metrics-file', metrics_path] + options + paths
+            rc = ipc.call(commandline, stdout=ipc.PIPE)
+            assert rc == 2, 'command exited with status {rc}'.format(rc=rc)
+            assert os.listdir(tmpdir) == ['pydiatra.prom'], repr(os.listdir(tmpdir))
+            with open(metrics_path, 'rb') as file:
+                metrics = file.read().decode('UTF-8')
+        lines = metrics.splitlines()
+        assert lines[-1] == '# EOF', repr(lines[-1])
+        assert 'pydiatra_files_total {n}'.format(n=len(paths)) in lines, metrics
+        assert 'pydiatra_tags_total{tag="bare-except"} 1' in lines, metrics
+        for line in lines:
+            if line.startswith('#'):
+                continue
+            _, value = line.rsplit(' ', 1)
+            float(value)
+
+# vim:ts=4 sts=4 sw=4 et
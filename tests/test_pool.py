@@ -0,0 +1,98 @@
+# encoding=UTF-8
+
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import os
+import time
+import warnings
+
+from nose.tools import (  # pylint: disable=no-name-in-module
+    assert_equal,
+    assert_is_none,
+    assert_raises,
+)
+
+from pydiatra import pool
+
+def test_worker_died():
+    executor = pool.Pool(max_workers=2)
+    try:
+        future = executor.submit(os._exit, 42)  # pylint: disable=protected-access
+        with assert_raises(pool.WorkerDied) as ecm:
+            future.result()
+        assert_equal(ecm.exception.exitcode, 42)
+        assert_is_none(ecm.exception.progress)
+        futures = [executor.submit(abs, -i) for i in range(10)]
+        assert_equal([f.result() for f in futures], list(range(10)))
+    finally:
+        executor.shutdown()
+
+def retire_and_getpid():
+    pool.retire()
+    return os.getpid()
+
+def test_retire():
+    executor = pool.Pool(max_workers=1)
+    try:
+        pid1 = executor.submit(retire_and_getpid).result()
+        pid2 = executor.submit(os.getpid).result()
+        pid3 = executor.submit(os.getpid).result()
+        assert pid1 != pid2, 'worker process was not replaced'
+        assert_equal(pid2, pid3)
+    finally:
+        executor.shutdown()
+
+def test_restart_with_threads():
+    executor = pool.Pool(max_workers=1)
+    try:
+        with warnings.catch_warnings(record=True) as wrns:
+            warnings.simplefilter('always')
+            # The replacement is started while the pool's thread is running.
+            # Python >= 3.12 warns if it's forked.
+            pid1 = executor.submit(retire_and_getpid).result()
+            pid2 = executor.submit(os.getpid).result()
+        assert pid1 != pid2, 'worker process was not replaced'
+        assert_equal([str(wrn.message) for wrn in wrns], [])
+    finally:
+        executor.shutdown()
+
+def test_timeout():
+    executor = pool.Pool(max_workers=1, timeout=0.2)
+    try:
+        future = executor.submit(time.sleep, 60)
+        with assert_raises(pool.Timeout):
+            future.result()
+        assert_equal(executor.submit(abs, -1).result(), 1)
+    finally:
+        executor.shutdown()
+
+def test_exception():
+    executor = pool.Pool(max_workers=1)
+    try:
+        future = executor.submit(int, 'eggs')
+        with assert_raises(ValueError):
+            future.result()
+        assert_equal(executor.submit(abs, -1).result(), 1)
+    finally:
+        executor.shutdown()
+
+# vim:ts=4 sts=4 sw=4 et
@@ -0,0 +1,83 @@
+# encoding=UTF-8
+
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import re
+import sys
+
+from nose.tools import (  # pylint: disable=no-name-in-module
+    assert_equal,
+    assert_is_none,
+)
+
+from pydiatra import prefilter
+
+def search_alternation(regexps, s, flags=0):
+    regexp = str.join('|', ('(%s)' % r for r in regexps))
+    match = re.search(regexp, s, flags)
+    if match is None:
+        return
+    for i, group in enumerate(match.groups()):
+        if group is not None:
+            return i
+
+def test_required_literal():
+    t = prefilter.required_literal
+    assert_equal(t('ab.cdef+'), 'cde')
+    assert_equal(t(r'\bfoo\(bar'), 'foo(bar')
+    assert_is_none(t('a|b'))
+    assert_is_none(t('(?i)foo'))
+
+def test_search():
+    regexps = [
+        'foobar',
+        'foo',
+        r'\bba[rz]quux',
+        'oba',
+    ]
+    if sys.version_info >= (3, 6):
+        # scoped inline flags
+        regexps += ['(?i:QUUX)']
+    regexps += ['x*']
+    for s in ['', 'foobar', 'xfoo', 'xfooba', 'barquux', 'foo bazquux', 'Quux', 'nothing']:
+        for n in range(1, len(regexps) + 1):
+            matcher = prefilter.MultiMatcher(regexps[:n], re.DOTALL)
+            assert_equal(
+                matcher.search(s),
+                search_alternation(regexps[:n], s, re.DOTALL),
+            )
+
+def test_overlapping_literals():
+    regexps = ['abcd', 'bc', 'cdef', 'ab']
+    matcher = prefilter.MultiMatcher(regexps)
+    for s in ['abcd', 'xbcdef', 'abcdef', 'ab', 'cd']:
+        assert_equal(matcher.search(s), search_alternation(regexps, s))
+
+def test_matcher_state():
+    regexps = [r'ab+c', r'\bfoo\(', r'[xy]z']
+    strings = ['abbc', 'foo(x)', 'yz', 'nothing']
+    matcher = prefilter.MultiMatcher(regexps)
+    state = matcher.get_state()
+    matcher = prefilter.MultiMatcher.from_state(state)
+    assert_equal(matcher.get_state(), state)
+    assert_equal([matcher.search(s) for s in strings], [0, 1, 2, None])
+
+# vim:ts=4 sts=4 sw=4 et
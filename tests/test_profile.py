@@ -0,0 +1,92 @@
+# encoding=UTF-8
+
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import io
+import os
+import subprocess as ipc
+import sys
+
+import tools
+
+def parse_sizes(lines):
+    sizes = {}
+    i = lines.index('') + 1
+    assert lines[i].split() == ['size', 'step'], repr(lines[i])
+    for line in lines[i + 1:]:
+        size, step = line.split()
+        sizes[step] = int(size)
+    return sizes
+
+def run_pydiatra(paths, options):
+    commandline = [sys.executable, tools.script] + options + paths
+    checker = ipc.Popen(commandline,  # pylint: disable=consider-using-with
+        stdout=ipc.PIPE,
+        stderr=ipc.PIPE,
+    )
+    stdout, stderr = checker.communicate()
+    assert checker.returncode == 2, 'command exited with status {rc}'.format(rc=checker.returncode)
+    return stdout.decode('UTF-8'), stderr.decode('UTF-8')
+
+def test():
+    paths = [
+        os.path.join(tools.here, 'regexp-syntax-error.t'),
+        os.path.join(tools.here, 'bare-except.t'),
+    ]
+    paths = [os.path.relpath(path) for path in paths]
+    for options in ([], ['-j2']):
+        stdout, stderr = run_pydiatra(paths, options=options + ['--profile'])
+        assert '{path}:5: bare-except\n'.format(path=paths[1]) in stdout
+        lines = stderr.splitlines()
+        assert lines[0].split() == ['calls', 'self', '[s]', '%', 'max', '[s]', 'step'], repr(lines[0])
+        n = lines.index('') - 1
+        assert lines[n].split()[-1] == '(total)', repr(lines[n])
+        steps = {}
+        for line in lines[1:n]:
+            calls, _, _, _, step = line.split()
+            steps[step] = int(calls)
+        assert steps['ast.parse'] == len(paths), repr(steps)
+        assert steps['visit'] == len(paths), repr(steps)
+        assert steps['checks.check_re_call'] > 0, repr(steps)
+        assert steps['check_re.check'] > 0, repr(steps)
+        assert steps['compile'] == len(paths), repr(steps)
+        # bare-except.t doesn't use the re module:
+        assert steps['checks.check_re_call-skipped'] == 1, repr(steps)
+        sizes = parse_sizes(lines)
+        assert list(sizes) == ['compile'], repr(sizes)
+
+def test_compile_skipped():
+    paths = [
+        os.path.join(tools.here, 'bare-except.t'),
+    ]
+    stdout, stderr = run_pydiatra(paths, options=['--profile', '--enable=bare-except'])
+    assert stdout.endswith(':5: bare-except\n'), repr(stdout)
+    lines = stderr.splitlines()
+    steps = [line.split()[-1] for line in lines if line]
+    assert 'compile-skipped' in steps, repr(steps)
+    assert 'compile' not in steps, repr(steps)
+    with io.open(paths[0], 'rt', encoding='UTF-8') as file:
+        source = file.read()
+    sizes = parse_sizes(lines)
+    assert sizes == {'compile-skipped': len(source)}, repr(sizes)
+
+# vim:ts=4 sts=4 sw=4 et
@@ -0,0 +1,54 @@
+# encoding=UTF-8
+
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import os
+
+import tools
+
+def test_size():
+    paths = [
+        os.path.join(tools.here, 'syntax-error.t'),
+        os.path.join(tools.here, 'test_tags.py'),
+        os.path.join(tools.here, 'bare-except.t'),
+        os.path.join(tools.here, 'run-tests'),
+    ]
+    paths = [os.path.relpath(path) for path in paths]
+    expected = [
+        '{path}:1: syntax-error invalid syntax'.format(path=paths[0]),
+        '{path}:5: bare-except'.format(path=paths[2]),
+    ]
+    tools.run_pydiatra(paths, expected, parallel=2, options=['--schedule=size'])
+
+def test_unordered():
+    paths = [
+        os.path.join(tools.here, 'test_tags.py'),
+        os.path.join(tools.here, 'bare-except.t'),
+        os.path.join(tools.here, 'run-tests'),
+    ]
+    paths = [os.path.relpath(path) for path in paths]
+    expected = [
+        '{path}:5: bare-except'.format(path=paths[1]),
+    ]
+    tools.run_pydiatra(paths, expected, parallel=2, options=['--unordered'])
+
+# vim:ts=4 sts=4 sw=4 et
@@ -0,0 +1,104 @@
+# encoding=UTF-8
+
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+
+from nose.tools import (  # pylint: disable=no-name-in-module
+    assert_in,
+    assert_not_in,
+    assert_raises,
+)
+
+import tools
+
+from pydiatra import tags
+
+def get_paths():
+    paths = [
+        os.path.join(tools.here, 'bare-except.t'),
+        os.path.join(tools.here, 'hardcoded-errno-value.t'),
+        os.path.join(tools.here, 'string-exception.t'),
+    ]
+    return [os.path.relpath(path) for path in paths]
+
+def test_enable():
+    paths = get_paths()
+    expected = [
+        '{path}:5: bare-except'.format(path=paths[0]),
+        '{path}:6: hardcoded-errno-value 2 -> errno.ENOENT'.format(path=paths[1]),
+        '{path}:14: hardcoded-errno-value 13 -> errno.EACCES'.format(path=paths[1]),
+        '{path}:22: hardcoded-errno-value 20 -> errno.ENOTDIR'.format(path=paths[1]),
+        '{path}:28: hardcoded-errno-value 28 -> errno.ENOSPC'.format(path=paths[1]),
+    ]
+    for parallel in (None, 2):
+        options = ['--enable', 'bare-except', '--enable=hardcoded-*']
+        tools.run_pydiatra(paths, expected, parallel=parallel, options=options)
+
+def test_disable():
+    paths = get_paths()
+    expected = [
+        '{path}:5: bare-except'.format(path=paths[0]),
+    ]
+    options = ['--enable', 'b*,h*', '--disable', 'hardcoded-errno-value']
+    tools.run_pydiatra(paths, expected, options=options)
+
+def test_min_severity():
+    paths = get_paths()
+    expected = [
+        '{path}:{n}: string-exception'.format(path=paths[2], n=n)
+        for n in (1, 2, 3, 7, 9, 11)
+    ]
+    tools.run_pydiatra(paths, expected, options=['--min-severity=important'])
+
+def test_compile():
+    paths = [
+        os.path.join(tools.here, 'assertion-always-true.t'),
+        os.path.join(tools.here, 'return-outside-function.t'),
+    ]
+    paths = [os.path.relpath(path) for path in paths]
+    expected = [
+        '{path}:1: assertion-always-true'.format(path=paths[0]),
+        '{path}:2: syntax-error \'return\' outside function'.format(path=paths[1]),
+    ]
+    tools.run_pydiatra(paths, expected, options=['--enable=assertion-*,syntax-error'])
+
+def test_cache():
+    paths = get_paths()
+    with tools.temporary_directory() as tmpdir:
+        options = ['--cache-dir', tmpdir]
+        expected = [
+            '{path}:5: bare-except'.format(path=paths[0]),
+        ]
+        tools.run_pydiatra(paths[:1], expected, options=options)
+        tools.run_pydiatra(paths[:1], [], options=options + ['--disable=bare-except'])
+        tools.run_pydiatra(paths[:1], expected, options=options)
+
+def test_selection():
+    selection = tags.Selection(enable=['regexp-*'], disable=['regexp-syntax-*'])
+    assert_in('regexp-duplicate-range', selection)
+    assert_not_in('regexp-syntax-error', selection)
+    assert_not_in('bare-except', selection)
+    assert_in('*syntax-error', selection)
+    with assert_raises(ValueError):
+        tags.Selection(enable=['nonesuch'])
+
+# vim:ts=4 sts=4 sw=4 et
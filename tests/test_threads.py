@@ -0,0 +1,46 @@
+# encoding=UTF-8
+
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import glob
+import os
+import subprocess as ipc
+import sys
+
+import tools
+
+def get_output(paths):
+    commandline = [sys.executable, tools.script] + paths
+    env = dict(os.environ, PYTHONIOENCODING='UTF-8')
+    checker = ipc.Popen(commandline, stdout=ipc.PIPE, env=env)  # pylint: disable=consider-using-with
+    stdout, _ = checker.communicate()
+    return stdout.decode('UTF-8').splitlines()
+
+def test():
+    paths = sorted(glob.glob(os.path.join(tools.here, '*.t')))
+    paths = [os.path.relpath(path) for path in paths]
+    expected = get_output(paths)
+    assert expected
+    # Check everything a few times over,
+    # to give the threads a chance to get in each other's way.
+    tools.run_pydiatra(paths * 4, expected * 4, parallel=4, options=['--threads'])
+
+# vim:ts=4 sts=4 sw=4 et
@@ -0,0 +1,65 @@
+# encoding=UTF-8
+
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import json
+import os
+import subprocess as ipc
+import sys
+
+import tools
+
+def test():
+    paths = [
+        os.path.join(tools.here, 'regexp-syntax-error.t'),
+        os.path.join(tools.here, 'bare-except.t'),
+    ]
+    for options in ([], ['-j2']):
+        with tools.temporary_directory() as tmpdir:
+            trace_path = os.path.join(tmpdir, 'trace.json')
+            commandline = [sys.executable, tools.script, '--trace-file', trace_path] + options + paths
+            rc = ipc.call(commandline, stdout=ipc.PIPE)
+            assert rc == 2, 'command exited with status {rc}'.format(rc=rc)
+            with open(trace_path, 'rb') as file:
+                trace = json.loads(file.read().decode('UTF-8'))
+        events = trace['traceEvents']
+        process_names = dict(
+            (e['pid'], e['args']['name'])
+            for e in events
+            if e['ph'] == 'M' and e['name'] == 'process_name'
+        )
+        spans = [e for e in events if e['ph'] == 'X']
+        for e in spans:
+            assert e['dur'] >= 0, repr(e)
+            assert e['pid'] in process_names, repr(e)
+        checked = sorted(e['args']['path'] for e in spans if e['name'] == 'check_file')
+        assert checked == sorted(paths), repr(checked)
+        names = set(e['name'] for e in spans)
+        for name in ['read', 'ast.parse', 'compile', 'visit', 'check_re.check', 'output']:
+            assert name in names, '{name!r} not in {names!r}'.format(name=name, names=names)
+        if options:
+            assert 'batch' in names, repr(names)
+            worker_pids = set(e['pid'] for e in spans if e['name'] == 'check_file')
+            for pid in worker_pids:
+                assert process_names[pid] == 'pydiatra worker', repr(process_names)
+
+# vim:ts=4 sts=4 sw=4 et
@@ -0,0 +1,87 @@
+# encoding=UTF-8
+
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import ast
+import sys
+
+from nose.tools import (  # pylint: disable=no-name-in-module
+    assert_equal,
+    assert_in,
+)
+
+from pydiatra import checks
+
+def test_deep_nesting():
+    # The tree is deeper than the recursion limit would allow
+    # a recursive visitor to go.
+    source = 'x = ' + str.join(' + ', ['a'] * 1200) + " + '%s' % ()"
+    node = ast.parse(source)
+    tags = checks.check_node('test.py', node)
+    assert_equal(
+        [str(t) for t in tags],
+        ['test.py:1: string-formatting-error not enough arguments for format string'],
+    )
+
+def test_register():
+    def check_lambda(owner, node):
+        owner.tags += [owner.tag(node, '*lambda')]
+    checks.register('Lambda')(check_lambda)
+    try:
+        node = ast.parse('f = lambda: 42\n\ng = lambda: lambda: 37\n')
+        tags = checks.check_node('test.py', node)
+        assert_equal(
+            [str(t) for t in tags],
+            ['test.py:1: *lambda', 'test.py:3: *lambda', 'test.py:3: *lambda'],
+        )
+    finally:
+        checks.registered_checks[:] = [
+            entry for entry in checks.registered_checks
+            if entry[0] is not check_lambda
+        ]
+        checks.clear_dispatch_tables()
+    tags = checks.check_node('test.py', node)
+    assert_equal(tags, [])
+
+def test_trigger():
+    def check_spam(owner, node):
+        if node.id == 'spam':
+            owner.tags += [owner.tag(node, '*spam')]
+    checks.register('Name', triggers=['spam'])(check_spam)
+    try:
+        sources = ['spam = 42\n', 'eggs = 42\n']
+        if sys.version_info >= (3,):
+            # non-ASCII identifiers are normalized to NFKC
+            sources += ['\uff53pam = 42\n']
+        for source in sources:
+            node = ast.parse(source)
+            tags = checks.check_node('test.py', node, source=source)
+            expected = [] if 'eggs' in source else ['test.py:1: *spam']
+            assert_equal([str(t) for t in tags], expected)
+        assert_in(check_spam, checks.get_skipped_checks(sources[1]))
+    finally:
+        checks.registered_checks[:] = [
+            entry for entry in checks.registered_checks
+            if entry[0] is not check_spam
+        ]
+        checks.clear_dispatch_tables()
+
+# vim:ts=4 sts=4 sw=4 et
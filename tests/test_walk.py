@@ -0,0 +1,77 @@
+# encoding=UTF-8
+
+# Copyright © 2026 Jakub Wilk <jwilk@jwilk.net>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the “Software”), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import os
+import subprocess as ipc
+import sys
+
+import tools
+
+def create_file(path, content, mode=None):
+    with open(path, 'wt') as file:  # pylint: disable=unspecified-encoding
+        file.write(content)
+    if mode is not None:
+        os.chmod(path, mode)
+
+def test():
+    with tools.temporary_directory() as tmpdir:
+        code = "raise 'eggs'\n"
+        shebang = '#!/usr/bin/python\n'
+        os.makedirs(os.path.join(tmpdir, 'a', 'b', '__pycache__'))
+        create_file(os.path.join(tmpdir, 'a', 'x.py'), code)
+        create_file(os.path.join(tmpdir, 'a', 'x.txt'), code)
+        create_file(os.path.join(tmpdir, 'a', 'b', 'y'), shebang + code, mode=0o755)
+        create_file(os.path.join(tmpdir, 'a', 'b', 'z'), shebang + code, mode=0o644)
+        create_file(os.path.join(tmpdir, 'a', 'b', 'z.pyc'), code)
+        create_file(os.path.join(tmpdir, 'a', 'b', '__pycache__', 'z.py'), code)
+        if hasattr(os, 'symlink') and os.name != 'nt':
+            os.symlink('b', os.path.join(tmpdir, 'a', 'c'))
+        expected = [
+            '{path}:1: string-exception'.format(path=os.path.join(tmpdir, 'a', 'x.py')),
+            '{path}:2: string-exception'.format(path=os.path.join(tmpdir, 'a', 'b', 'y')),
+        ]
+        for parallel in (None, 2):
+            tools.run_pydiatra([tmpdir], expected, parallel=parallel)
+
+def test_missing_file():
+    good_path = os.path.relpath(os.path.join(tools.here, 'bare-except.t'))
+    with tools.temporary_directory() as tmpdir:
+        missing_path = os.path.join(tmpdir, 'missing.py')
+        for options in ([], ['-j2']):
+            commandline = [sys.executable, tools.script] + options + [good_path, missing_path]
+            checker = ipc.Popen(commandline,  # pylint: disable=consider-using-with
+                stdout=ipc.PIPE,
+                stderr=ipc.PIPE,
+            )
+            stdout, stderr = checker.communicate()
+            stdout = stdout.decode('UTF-8')
+            stderr = stderr.decode('UTF-8')
+            # It's not an internal error,
+            # and it's reported the same way with or without -j.
+            assert checker.returncode == 1, 'command exited with status {rc}'.format(rc=checker.returncode)
+            assert stdout == '{path}:5: bare-except\n'.format(path=good_path), repr(stdout)
+            last_line = stderr.splitlines()[-1]
+            assert 'No such file or directory' in last_line, repr(last_line)
+            assert repr(missing_path) in last_line, repr(last_line)
+
+# vim:ts=4 sts=4 sw=4 et
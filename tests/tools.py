@@ -1,6 +1,6 @@
 # encoding=UTF-8
 
-# Copyright © 2013-2025 Jakub Wilk <jwilk@jwilk.net>
+# Copyright © 2013-2026 Jakub Wilk <jwilk@jwilk.net>
 #
 # Permission is hereby granted, free of charge, to any person obtaining a copy
 # of this software and associated documentation files (the “Software”), to deal
@@ -20,10 +20,13 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import contextlib
 import difflib
 import os
+import shutil
 import subprocess as ipc
 import sys
+import tempfile
 
 if sys.version_info >= (3, 0):
     # pylint: disable=import-error
@@ -40,7 +43,7 @@ basedir = os.path.relpath(basedir)
 
 script = '{dir}/py{v}diatra'.format(dir=basedir, v=sys.version_info[0])
 
-def run_pydiatra(paths, expected, expected_stderr=None, parallel=None, env=None):
+def run_pydiatra(paths, expected, expected_stderr=None, parallel=None, env=None, options=None):  # pylint: disable=too-many-arguments,too-many-positional-arguments
     env = env or {}
     env = dict(os.environ, **env)
     env.update(PYTHONIOENCODING='UTF-8')
@@ -49,7 +52,7 @@ def run_pydiatra(paths, expected, expected_stderr=None, parallel=None, env=None)
     pyflags = '-tt'
     if sys.version_info < (3,):
         pyflags += '3'
-    options = []
+    options = list(options or [])
     if parallel is True:
         options += ['-jauto']
     elif parallel is not None:
@@ -91,6 +94,14 @@ def run_pydiatra(paths, expected, expected_stderr=None, parallel=None, env=None)
     if message:
         raise AssertionError(str.join('\n', message))
 
+@contextlib.contextmanager
+def temporary_directory():
+    tmpdir = tempfile.mkdtemp(prefix='pydiatra.')
+    try:
+        yield tmpdir
+    finally:
+        shutil.rmtree(tmpdir)
+
 def get_tag_names():
     path = os.path.join(basedir, 'pydiatra', 'data', 'tags')
     os.stat(path)
@@ -106,6 +117,7 @@ __all__ = [
     'get_tag_names',
     'run_pydiatra',
     'script',
+    'temporary_directory',
 ]
 
 # vim:ts=4 sts=4 sw=4 et